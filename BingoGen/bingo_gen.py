@@ -1,14 +1,27 @@
+import io
 import os
 import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from PIL import Image
 from fpdf import FPDF
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DictionaryObject, NameObject
 import argparse
 
+from BingoGen.cards import generate_unique_cards, export_cards
+from BingoGen.image_prep import prepare_images, DEFAULT_DPI
+
 MARGIN = 5
+CARDS_PER_PAGE = 6
 
 def scale_image(image_file, cell_width, cell_height, margin=3):
     image = Image.open(image_file)
     width, height = image.size
+    return fit_in_cell(width, height, cell_width, cell_height, margin)
+
+def fit_in_cell(width, height, cell_width, cell_height, margin=3):
+    # The size and offset in the cell of an image of width x height, scaled to fit the cell:
     original_aspect_ratio = width / height
 
     if width >= height:
@@ -23,18 +36,112 @@ def scale_image(image_file, cell_width, cell_height, margin=3):
 
     return image_width, image_height, x_offset, y_offset
 
-def generate_bingo_card(image_files, output_file, card_size, n_pages=30):
-    # Create a new PDF doc
+def generate_bingo_card(image_files, output_file, card_size, n_pages=30, dpi=DEFAULT_DPI, seed=None, workers=1,
+                        cards=None, max_line_overlap=None, cards_file=None):
+    # output_file is a file name or a binary stream. With workers > 1 the pages are rendered in chunks in that many
+    # processes and merged - the cards are drawn up front (from the seed), so the result doesn't depend on workers.
+    # cards (optional) is a list of n_pages * CARDS_PER_PAGE cards, as returned by generate_unique_cards. Otherwise
+    # distinct cards are generated, with at most max_line_overlap images shared by lines of different cards (if given).
+    # cards_file (optional) is a JSON file to save the images of each card to (see export_cards).
+    image_files = list(image_files)
+
+    # Shrink every image to the cell size once - the cards reuse the prepared images:
+    _, image_width, _ = _card_layout(card_size)
+    images = prepare_images(image_files, image_width, dpi) if dpi else None
+    if cards is None:
+        cards = generate_unique_cards(len(image_files), card_size, n_pages * CARDS_PER_PAGE, seed, max_line_overlap)
+    if cards_file is not None:
+        export_cards(cards, image_files, cards_file, CARDS_PER_PAGE)
+
+    n_chunks = min(workers, n_pages)
+    if n_chunks <= 1:
+        _build_pdf(image_files, card_size, cards, images).output(output_file)
+        return
+
+    # Contiguous chunks of pages, one for each process:
+    pages_per_chunk = -(-n_pages // n_chunks)
+    chunk_cards = [cards[start * CARDS_PER_PAGE:(start + pages_per_chunk) * CARDS_PER_PAGE]
+                   for start in range(0, n_pages, pages_per_chunk)]
+    with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+        chunks = list(executor.map(_render_chunk, repeat(image_files), repeat(card_size), chunk_cards, repeat(images)))
+    merge_pdfs(chunks, output_file)
+
+def _build_pdf(image_files, card_size, cards, images=None):
+    # A PDF with a page for every CARDS_PER_PAGE cards
     pdf = FPDF()
+    for start in range(0, len(cards), CARDS_PER_PAGE):
+        add_bingo_page(card_size, image_files, pdf, images, cards[start:start + CARDS_PER_PAGE])
+    return pdf
+
+def _render_chunk(image_files, card_size, cards, images=None):
+    # Runs in a worker process - returns the PDF bytes of a chunk of pages
+    return bytes(_build_pdf(image_files, card_size, cards, images).output())
+
+def merge_pdfs(pdfs, output_file):
+    # Write the pages of the PDFs (given as bytes), in order, to one PDF file (or binary stream). Every chunk embeds its
+    # own copy of the images, so an image that is already in the output is referenced by the page instead of copied.
+    writer = PdfWriter()
+    merged_images = {}  # _image_key -> the image in writer
+    for data in pdfs:
+        for page in PdfReader(io.BytesIO(data)).pages:
+            new_images = {}
+            xobjects = _page_xobjects(page)
+            for name in list(xobjects):
+                if getattr(xobjects.raw_get(name), 'pdf', None) is writer:
+                    continue  # The page shares the resources of an earlier page, which were merged already
+                image = xobjects[name]
+                if image.get('/Subtype') != '/Image':
+                    continue
+                key = _image_key(image)
+                if key in merged_images:
+                    xobjects[NameObject(name)] = merged_images[key]
+                else:
+                    new_images[name] = key
+            new_xobjects = _page_xobjects(writer.add_page(page))
+            for name, key in new_images.items():
+                merged_images[key] = new_xobjects.raw_get(name)
+    writer.write(output_file)
+
+def _page_xobjects(page):
+    # The images (and other XObjects) of a page, by name. Indexing resolves indirect objects, get() doesn't
+    resources = page['/Resources'] if '/Resources' in page else DictionaryObject()
+    return resources['/XObject'] if '/XObject' in resources else DictionaryObject()
+
+def _stream_bytes(stream, skip=()):
+    # A stream as it is written to the PDF - its dictionary (without the skip keys) and its encoded data. Comparing the
+    # encoded data needs no decoding, which PyPDF2 can't do for every image filter
+    skipped = {key: stream.raw_get(key) for key in skip if key in stream}
+    for key in skipped:
+        del stream[key]
+    data = io.BytesIO()
+    try:
+        stream.write_to_stream(data, None)
+    finally:
+        stream.update(skipped)
+    return data.getvalue()
+
+def _image_key(image):
+    # The same image in different chunks is written the same, except for the object number of its alpha mask (if it
+    # has one) - so the mask is compared by its own content
+    mask = _stream_bytes(image['/SMask']) if '/SMask' in image else None
+    return _stream_bytes(image, skip=('/SMask',)), mask
+
+
+def _card_layout(card_size):
+    # page_width, page_height = pdf.get_page_width(), pdf.get_page_height()
+    page_width = 210  # Default page width in millimeters.
+    page_height = 297  # Default page height in millimeters.
 
-    for page in range(n_pages):
-        add_bingo_page(card_size, image_files, pdf)
-
-    # Save the PDF document
-    pdf.output(output_file)
+    # Create the start offsets for each table - we have MARGIN on the top and bottom, and also between tables.
+    # So we want the overall height to be divided between 3 tables and 4 MARGINs.
+    # Tables are square, so height is equal to width
+    table_height = (page_height - 3*MARGIN) // 3
 
+    # Calculate image width and height based on card size
+    image_width = int((table_height - MARGIN) / card_size)
+    return table_height, image_width, image_width
 
-def add_bingo_page(card_size, image_files, pdf):
+def add_bingo_page(card_size, image_files, pdf, images=None, cards=None):
     # Add a page with 6 puzzles to the PDF. First find the locations of the top left corner of each puzzle:
     # Add a page to the PDF
     pdf.add_page()
@@ -42,38 +149,40 @@ def add_bingo_page(card_size, image_files, pdf):
     pdf.set_draw_color(0, 0, 0)
     pdf.set_line_width(1)
 
-    # page_width, page_height = pdf.get_page_width(), pdf.get_page_height()
-    page_width = 210  # Default page width in millimeters.
-    page_height = 297  # Default page height in millimeters.
-
-    # Create the start offsets for each table - we have MARGIN on the top and bottom, and also between tables.
-    # So we want the overall height to be divided between 3 tables and 4 MARGINs.
-    # Tables are square, so height is equal to width
-    table_height = (page_height - 3*MARGIN) // 3
+    table_height, image_width, image_height = _card_layout(card_size)
     table_width = table_height
 
-    # Calculate image width and height based on card size
-    image_width = int((table_width - MARGIN) / card_size)
-    image_height = image_width
-
     for n_row in range(3):
         table_top_left_y = (MARGIN + table_height) * n_row + MARGIN
         for n_col in range(2):
             table_top_left_x = (MARGIN + table_width) * n_col + MARGIN
 
-            # Shuffle the image files list
-            random.shuffle(image_files)
-            add_bingo_table(pdf, card_size, image_files, image_width, image_height, table_top_left_x, table_top_left_y)
+            if cards is not None:
+                # The image order of this card is given:
+                card_files = [image_files[i] for i in cards[n_row * 2 + n_col]]
+            else:
+                # Shuffle the image files list
+                random.shuffle(image_files)
+                card_files = image_files
+            add_bingo_table(pdf, card_size, card_files, image_width, image_height, table_top_left_x, table_top_left_y,
+                            images)
 
 
-def add_bingo_table(pdf, card_size, image_files, image_width, image_height, x_start, y_start):
+def add_bingo_table(pdf, card_size, image_files, image_width, image_height, x_start, y_start, images=None):
+    # images (optional) is a dict of image file -> PreparedImage (see image_prep.prepare_images), to use instead of the
+    # image files. fpdf embeds each distinct image once, however many cells it is in.
     # Iterate through each cell of the bingo card
     for row in range(card_size):
         for col in range(card_size):
             # Get the image file for the current cell
             image_file = image_files[row * card_size + col]
 
-            w, h, x_offset, y_offset = scale_image(image_file, image_width, image_height)
+            if images is not None:
+                image = images[image_file]
+                w, h, x_offset, y_offset = fit_in_cell(image.width, image.height, image_width, image_height)
+                image_file = image.data
+            else:
+                w, h, x_offset, y_offset = scale_image(image_file, image_width, image_height)
 
             # Insert the image into the PDF document
             x = col * image_width + x_start
@@ -96,6 +205,13 @@ if __name__ == "__main__":
     parser.add_argument("-d", "--directory", type=str, help="Directory with images")
     parser.add_argument("-p", "--pages", type=int, default=5, help="Number of pages")
     parser.add_argument("-o", "--output_file", type=str, default="bingo.pdf", help="Output file name")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI,
+                        help="Shrink the images to this resolution (0 to embed the original images)")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="Random seed for the cards")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of processes to render the pages in")
+    parser.add_argument("--max_overlap", type=int, default=None,
+                        help="Max number of images a row or column may share with a row or column of another card")
+    parser.add_argument("-c", "--cards_file", type=str, default=None, help="Save the images of each card to this JSON file")
     args = parser.parse_args()
 
     # Get the list of image files - list files in args,directory. Keep only image files (png, jpeg):
@@ -105,4 +221,5 @@ if __name__ == "__main__":
     output_file = args.output_file
 
     # Generate the bingo card
-    generate_bingo_card(image_files, output_file, args.grid_size, args.pages)
+    generate_bingo_card(image_files, output_file, args.grid_size, args.pages, args.dpi, args.seed, args.workers,
+                        max_line_overlap=args.max_overlap, cards_file=args.cards_file)
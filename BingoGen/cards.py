@@ -0,0 +1,118 @@
+"""
+Generate sets of distinct bingo cards.
+
+A card is a tuple of card_size * card_size image indexes, row by row. Every card in a set is different, and optionally
+no row or column of one card shares more than max_line_overlap images with a row or column of another card - so when
+the images of a winning line are called, another card rarely wins at the same time.
+
+Both checks are set lookups, so they stay fast for thousands of cards: the cards are kept in a set of tuples, and the
+lines as bitmasks (bit i is image i) of all their subsets of max_line_overlap + 1 images. A new card is rejected if any
+of its line subsets is in the set already.
+"""
+import json
+import random
+from itertools import combinations
+
+
+def card_lines(card, card_size):
+    """
+    The winning lines of a card
+    :param card: A tuple of image indexes, row by row
+    :param card_size: The number of rows (and columns)
+    :return: A list of tuples of image indexes - the rows, then the columns
+    """
+    rows = [card[r * card_size:(r + 1) * card_size] for r in range(card_size)]
+    columns = [card[c::card_size] for c in range(card_size)]
+    return rows + columns
+
+
+def _line_keys(card, card_size, max_line_overlap):
+    # The bitmasks of all the subsets of max_line_overlap + 1 images of each line of the card
+    keys = set()
+    for line in card_lines(card, card_size):
+        for subset in combinations(line, max_line_overlap + 1):
+            mask = 0
+            for i in subset:
+                mask |= 1 << i
+            keys.add(mask)
+    return keys
+
+
+def generate_unique_cards(n_images, card_size, n_cards, seed=None, max_line_overlap=None, max_attempts=None):
+    """
+    Generate distinct cards
+    :param n_images: The number of images to choose from
+    :param card_size: The number of rows (and columns) of a card
+    :param n_cards: The number of cards
+    :param seed: The random seed. The same seed gives the same cards
+    :param max_line_overlap: If not None, the maximal number of images a row or column of one card may share with a row
+        or column of any other card. card_size - 1 means no two cards have the same winning line
+    :param max_attempts: The number of random cards to try before giving up (None for 1000 + 100 per card)
+    :return: A list of n_cards tuples of image indexes
+    """
+    n_cells = card_size * card_size
+    if n_images < n_cells:
+        raise ValueError(f"A {card_size}x{card_size} card needs at least {n_cells} images, got {n_images}")
+    if max_line_overlap is not None and not 0 <= max_line_overlap < card_size:
+        raise ValueError(f"max_line_overlap must be between 0 and {card_size - 1}")
+    if max_attempts is None:
+        max_attempts = 1000 + 100 * n_cards
+
+    rng = random.Random(seed)
+    cards = []
+    seen_cards = set()
+    seen_lines = set()
+    attempts = 0
+    while len(cards) < n_cards:
+        attempts += 1
+        if attempts > max_attempts:
+            raise ValueError(f"Found only {len(cards)} of {n_cards} cards in {max_attempts} attempts - use more "
+                             f"images or a larger max_line_overlap")
+        card = tuple(rng.sample(range(n_images), n_cells))
+        if card in seen_cards:
+            continue
+        if max_line_overlap is not None:
+            keys = _line_keys(card, card_size, max_line_overlap)
+            if not seen_lines.isdisjoint(keys):
+                continue
+            seen_lines |= keys
+        seen_cards.add(card)
+        cards.append(card)
+    return cards
+
+
+def max_line_overlap_of(cards, card_size):
+    """
+    The largest number of images a row or column of one card shares with a row or column of another card. Compares
+    all pairs, to verify a set of cards
+    :return: The overlap (0 for less than two cards)
+    """
+    line_sets = [[frozenset(line) for line in card_lines(card, card_size)] for card in cards]
+    res = 0
+    for i in range(len(line_sets)):
+        for j in range(i + 1, len(line_sets)):
+            for line_a in line_sets[i]:
+                for line_b in line_sets[j]:
+                    res = max(res, len(line_a & line_b))
+    return res
+
+
+def export_cards(cards, image_files, output_file, cards_per_page=6):
+    """
+    Save which images are on each card, so the caller can verify the cards (and check a winner's card)
+    :param cards: The cards, in the order they are printed
+    :param image_files: The image files the indexes refer to
+    :param output_file: The name of the JSON file, or a text stream to write it to
+    :param cards_per_page: The number of cards on a page
+    """
+    data = {
+        "image_files": list(image_files),
+        "cards": [{"card": n + 1, "page": n // cards_per_page + 1, "indexes": list(card),
+                   "images": [image_files[i] for i in card]}
+                  for n, card in enumerate(cards)],
+    }
+    if isinstance(output_file, str):
+        with open(output_file, 'w', encoding='utf-8') as fp:
+            json.dump(data, fp, ensure_ascii=False, indent=1)
+    else:
+        json.dump(data, output_file, ensure_ascii=False, indent=1)
@@ -0,0 +1,67 @@
+"""
+Prepare the bingo images once before they are put on the cards: decode each source image, shrink it to the resolution
+it is printed at, and compress it again. The cards then reuse the same small image data and dimensions, instead of
+opening every image file for every cell and embedding the full-size originals in the PDF. A JPEG or PNG that is small
+enough already is used as it is.
+"""
+import io
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from PIL import Image
+
+DEFAULT_DPI = 150
+JPEG_QUALITY = 85
+MM_PER_INCH = 25.4
+EMBEDDED_FORMATS = ('JPEG', 'PNG')  # The formats the PDF can embed without converting them
+
+# The image data to embed (JPEG or PNG bytes), and the size of the source image in pixels:
+PreparedImage = namedtuple('PreparedImage', ['data', 'width', 'height'])
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+@lru_cache(maxsize=256)
+def _prepare_image(image_file, mtime_ns, max_pixels):
+    # Cached by the file's modification time too, so a changed file is prepared again
+    with open(image_file, 'rb') as fp:
+        source = fp.read()
+    with Image.open(io.BytesIO(source)) as image:
+        width, height = image.size
+        if image.format in EMBEDDED_FORMATS and max(width, height) <= max_pixels:
+            return PreparedImage(source, width, height)  # Decoding and compressing it again would only cost time
+        image.draft('RGB', (max_pixels, max_pixels))  # Lets JPEGs decode at a reduced size
+        if _has_alpha(image):
+            image = image.convert('RGBA')
+            image_format, save_args = 'PNG', dict()
+        else:
+            image = image.convert('RGB')
+            image_format, save_args = 'JPEG', dict(quality=JPEG_QUALITY, optimize=True)
+        image.thumbnail((max_pixels, max_pixels), Image.LANCZOS)  # Keeps the aspect ratio, never enlarges
+
+        data = io.BytesIO()
+        image.save(data, image_format, **save_args)
+    return PreparedImage(data.getvalue(), width, height)
+
+
+def prepare_image(image_file, cell_size_mm, dpi=DEFAULT_DPI):
+    """
+    Prepare one image to be printed in a cell
+    :param image_file: The image file
+    :param cell_size_mm: The size of the (square) cell the image is printed in, in mm
+    :param dpi: The resolution to print at. Images larger than the cell at this resolution are shrunk
+    :return: A PreparedImage
+    """
+    max_pixels = max(1, int(round(cell_size_mm / MM_PER_INCH * dpi)))
+    return _prepare_image(image_file, os.stat(image_file).st_mtime_ns, max_pixels)
+
+
+def prepare_images(image_files, cell_size_mm, dpi=DEFAULT_DPI):
+    """
+    Prepare all the images of a bingo set (see prepare_image)
+    :return: A dict of image file -> PreparedImage
+    """
+    return {image_file: prepare_image(image_file, cell_size_mm, dpi) for image_file in set(image_files)}
@@ -1,31 +1,31 @@
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, PageBreak, Paragraph, Table, TableStyle, Spacer, Frame, PageTemplate
+from reportlab.platypus import SimpleDocTemplate, PageBreak, Paragraph, Table, TableStyle, Spacer, Frame, PageTemplate, \
+    Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
-import random
-import os
+import numpy as np
 
-def _get_parent_dir():
-    # Get the path of the current module
-    current_module_path = __file__
+from Math.questions import generate_questions
+from fonts.registry import register_font, HEBREW_FONT
 
-    # Get the directory containing the current module
-    current_module_directory = os.path.dirname(current_module_path)
-
-    # Get the absolute path of the directory
-    absolute_directory = os.path.abspath(current_module_directory)
-
-    # Get the directory above the current module
-    folder_above = os.path.dirname(absolute_directory)
+DIR_VERTICAL = 0
+DIR_HORIZONTAL = 1
 
-    return folder_above
+# How the questions are drawn in the PDF:
+RENDER_TABLE = 'table'  # A reportlab Table with Paragraphs in every cell
+RENDER_CANVAS = 'canvas'  # Drawn straight on the canvas (QuestionGrid) - the same look, much faster
 
-pdfmetrics.registerFont(TTFont('Hebrew', os.path.join(_get_parent_dir(), 'fonts', 'arial-hebrew.ttf')))
+NCOLS = 3
+COL_WIDTH = 150
 
-DIR_VERTICAL = 0
-DIR_HORIZONTAL = 1
+# Shared by the tables of all the worksheets:
+questions_table_style = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 18),
+])
 
 left_style = ParagraphStyle(
     name='CustomStyle',
@@ -41,13 +41,23 @@ right_style = ParagraphStyle(
     alignment=TA_RIGHT,
 )
 
+# Smaller, so the longest answers (1000 × 1000 = 1000000) fit in a cell:
+answer_style = ParagraphStyle(
+    name='CustomStyle',
+    fontName='Helvetica',
+    fontSize=12,
+    alignment=TA_RIGHT,
+)
+
 heb_title_style = ParagraphStyle(
     name='CustomStyle',
-    fontName='Hebrew',
+    fontName=HEBREW_FONT,
     fontSize=20,
     alignment=TA_CENTER,
 )
 
+title_style = getSampleStyleSheet()['Title']
+
 def create_vertical_question(num1, operation, num2):
     paragraph = [Paragraph(f'{str(num1)}<br/>', right_style),
                  Paragraph(f'{operation}<br/>', left_style),
@@ -59,60 +69,222 @@ def create_horizontal_question(num1, operation, num2):
     paragraph = Paragraph(f'{str(num1)} {operation} {str(num2)} = <br/><br/><br/>', right_style)
     return paragraph
 
-def generate_math_worksheet(title, operation, number_range, num_questions, output_pdf, direction=DIR_VERTICAL,
-                            invert_title_text=True):
-    doc = SimpleDocTemplate(output_pdf, pagesize=letter)
-    story = []
+def create_answer(num1, operation, num2, answer):
+    paragraph = Paragraph(f'{str(num1)} {operation} {str(num2)} = {str(answer)}<br/><br/><br/>', answer_style)
+    return paragraph
+
+class QuestionGrid(Flowable):
+    """
+    The table of questions drawn straight on the canvas, looking the same as the Table of Paragraphs of
+    _questions_table. All the questions are written in one text object. Like a Table, it splits between rows when it
+    doesn't fit on the page.
+    """
+    # The cell padding of a Table, and the fonts of the Paragraphs (right_style and answer_style have the default
+    # leading):
+    padding_side = 6
+    padding_top = 3
+    padding_bottom = 3
+    font_name = 'Helvetica'
+    font_size = 18
+    answer_font_size = 12
+    leading = 12
+
+    def __init__(self, questions, direction=DIR_VERTICAL, answers=False):
+        """
+        :param questions: A list of Question tuples (num1, symbol, num2, answer), NCOLS in a row
+        :param direction: DIR_VERTICAL or DIR_HORIZONTAL questions
+        :param answers: If True, the questions are written with their answers (in one line, as an answer key)
+        """
+        Flowable.__init__(self)
+        self.questions = questions
+        self.direction = direction
+        self.answers = answers
+        self.hAlign = 'CENTER'
+        self.font_size = self.answer_font_size if answers else QuestionGrid.font_size
+        self.n_rows = -(-len(questions) // NCOLS)
+        # Vertical questions are 8 lines: num1, the operation, then num2, the line under it and 4 empty lines.
+        # Horizontal questions (and answers) are 3 lines: the question and 2 empty lines
+        lines = 8 if direction == DIR_VERTICAL and not answers else 3
+        self.row_height = lines * self.leading + self.padding_top + self.padding_bottom
+
+    def wrap(self, avail_width, avail_height):
+        return NCOLS * COL_WIDTH, self.n_rows * self.row_height
 
-    # Create a title for the worksheet
-    title_style_ = getSampleStyleSheet()['Title']
+    def split(self, avail_width, avail_height):
+        n_rows = int(avail_height // self.row_height)
+        if n_rows <= 0 or n_rows >= self.n_rows:
+            return []
+        return [QuestionGrid(self.questions[:n_rows * NCOLS], self.direction, self.answers),
+                QuestionGrid(self.questions[n_rows * NCOLS:], self.direction, self.answers)]
+
+    def draw(self):
+        text = self.canv.beginText()
+        text.setFont(self.font_name, self.font_size)
+        cell_width = COL_WIDTH - 2 * self.padding_side
+        height = self.n_rows * self.row_height
+
+        def write(s, left, baseline, centered=False):
+            width = pdfmetrics.stringWidth(s, self.font_name, self.font_size)
+            x = left + (cell_width - width) / 2 if centered else left + cell_width - width
+            text.setTextOrigin(x, baseline)
+            text.textOut(s)
+
+        for n, (num1, symbol, num2, answer) in enumerate(self.questions):
+            row, col = divmod(n, NCOLS)
+            left = col * COL_WIDTH + self.padding_side
+            baseline = height - row * self.row_height - self.padding_top - self.font_size
+            if self.answers:
+                write(f'{num1} {symbol} {num2} = {answer}', left, baseline)
+            elif self.direction == DIR_VERTICAL:
+                write(str(num1), left, baseline)
+                write(symbol, left, baseline - self.leading, centered=True)
+                write(str(num2), left, baseline - 2 * self.leading)
+                write('----------', left, baseline - 3 * self.leading)
+            else:
+                write(f'{num1} {symbol} {num2} =', left, baseline)
+        self.canv.drawText(text)
+
+def _title(title, invert_title_text=True, version=None):
+    """
+    The title paragraph of a worksheet
+    :param version: If not None, the version number is written under the title
+    """
+    title_style_ = title_style
     if invert_title_text:
         # Hebrew text - invert and use the title style for hebrew
         title = title[::-1]
         title_style_ = heb_title_style
-    title_text = Paragraph(title + "<br/><br/><br/>", title_style_)
-    story.append(title_text)
-
-    # Define the operation symbol and operator function
-    if operation == 'plus':
-        symbol = '+'
-        operator = lambda x, y: x + y
-    elif operation == 'minus':
-        symbol = '-'
-        operator = lambda x, y: x - y
-    elif operation == 'times':
-        symbol = '×'
-        operator = lambda x, y: x * y
-    else:
-        raise ValueError(f"Unknown symbol")
+    if version is None:
+        return Paragraph(title + "<br/><br/><br/>", title_style_)
+    return Paragraph(title + f"<br/><font name='Helvetica' size='12'>#{version}</font><br/><br/>", title_style_)
+
+def _questions_table(questions, direction=DIR_VERTICAL, renderer=RENDER_TABLE, answers=False):
+    """
+    The table of the questions, NCOLS in a row
+    :param questions: A list of Question tuples (see Math.questions.generate_questions)
+    :param direction: DIR_VERTICAL or DIR_HORIZONTAL questions
+    :param renderer: RENDER_TABLE or RENDER_CANVAS
+    :param answers: If True, write the questions with their answers
+    :return: A flowable
+    """
+    if renderer == RENDER_CANVAS:
+        return QuestionGrid(questions, direction, answers)
 
     table_data = []
-    ncols = 3
-    for _ in range(num_questions // ncols):
+    for start in range(0, len(questions), NCOLS):
         row_data = []
-        for _ in range(ncols):
-            num2 = random.randint(1, number_range)
-            if (symbol != "*") or (direction == DIR_VERTICAL):
-                num1 = random.randint(num2, number_range)
-            else:
-                num1 = random.randint(1, number_range)
-
+        for num1, symbol, num2, answer in questions[start:start + NCOLS]:
             # Create the question in the row:
-            if direction == DIR_VERTICAL:
+            if answers:
+                row_data.append(create_answer(num1, symbol, num2, answer))
+            elif direction == DIR_VERTICAL:
                 row_data.append(create_vertical_question(num1, symbol, num2))
             else:
                 row_data.append(create_horizontal_question(num1, symbol, num2))
+        row_data += [''] * (NCOLS - len(row_data))
         table_data.append(row_data)
 
-    table = Table(table_data, colWidths=[150, 150, 150])
-    table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 18),
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 10))
+    table = Table(table_data, colWidths=[COL_WIDTH] * NCOLS)
+    table.setStyle(questions_table_style)
+    return table
+
+def _worksheet_elements(title, operation, number_range, num_questions, direction=DIR_VERTICAL,
+                        invert_title_text=True, seed=None, questions=None, renderer=RENDER_TABLE, version=None,
+                        **constraints):
+    """
+    The flowables of one worksheet: the title and the table of questions. See generate_math_worksheet for the
+    parameters
+    :param questions: The questions to use (see Math.questions.generate_questions), or None to generate them
+    :param renderer: RENDER_TABLE or RENDER_CANVAS
+    :param version: If not None, the version number written under the title
+    :return: A list of flowables
+    """
+    if questions is None:
+        questions = generate_questions(operation, number_range, (num_questions // NCOLS) * NCOLS, seed, **constraints)
+    return [_title(title, invert_title_text, version),
+            _questions_table(questions, direction, renderer),
+            Spacer(1, 10)]
+
+def _answer_key_elements(title, questions, invert_title_text=True, renderer=RENDER_TABLE, version=None):
+    """
+    The flowables of the answer key of a worksheet: its title and the questions with their answers
+    :return: A list of flowables
+    """
+    title += " - פתרון" if invert_title_text else " - Answers"
+    return [_title(title, invert_title_text, version),
+            _questions_table(questions, DIR_HORIZONTAL, renderer, answers=True),
+            Spacer(1, 10)]
+
+def generate_math_worksheet(title, operation, number_range, num_questions, output_pdf, direction=DIR_VERTICAL,
+                            invert_title_text=True, seed=None, **constraints):
+    """
+    Create a PDF worksheet with random questions
+    :param title: The title of the worksheet
+    :param operation: 'plus', 'minus' or 'times'
+    :param number_range: The largest number in the questions
+    :param num_questions: The number of questions (rounded down to full rows of 3)
+    :param output_pdf: The name of the PDF to save, or a binary stream to write it to (e.g. io.BytesIO)
+    :param direction: DIR_VERTICAL or DIR_HORIZONTAL questions
+    :param invert_title_text: If True the title is hebrew
+    :param seed: The random seed of the questions
+    :param constraints: The constraints on the questions - regroup, min_result, max_result, distinct (see
+        Math.questions.generate_questions)
+    :return:
+    """
+    generate_math_worksheets([dict(title=title, operation=operation, number_range=number_range,
+                                   num_questions=num_questions, direction=direction,
+                                   invert_title_text=invert_title_text, seed=seed, **constraints)],
+                             output_pdf)
+
+def generate_math_worksheets(worksheets, output_pdf, renderer=RENDER_TABLE):
+    """
+    Create one PDF with many worksheets, each starting on a new page. The fonts are embedded in the document once for
+    all the worksheets
+    :param worksheets: A list of dicts with the arguments of generate_math_worksheet for each worksheet (title,
+        operation, number_range, num_questions and optionally direction, invert_title_text, seed and the constraints)
+    :param output_pdf: The name of the PDF to save, or a binary stream to write it to (e.g. io.BytesIO)
+    :param renderer: RENDER_TABLE or RENDER_CANVAS
+    :return:
+    """
+    register_font(HEBREW_FONT)
+    _build_pdf([_worksheet_elements(renderer=renderer, **worksheet) for worksheet in worksheets], output_pdf)
+
+def generate_math_packet(title, operation, number_range, num_questions, output_pdf, n_versions, direction=DIR_VERTICAL,
+                         invert_title_text=True, seed=None, answer_keys=True, renderer=RENDER_CANVAS, **constraints):
+    """
+    Create one PDF with n_versions versions of a worksheet, each with its own questions (e.g. one for every student),
+    followed by their answer keys. See generate_math_worksheet for the other parameters
+    :param n_versions: The number of versions. Each is numbered under its title (if there are more than one)
+    :param seed: The random seed of the packet. The same seed gives the same versions, and every version has different
+        questions
+    :param answer_keys: If True, an answer key of each version is added at the end
+    :param renderer: RENDER_TABLE or RENDER_CANVAS
+    :return: A list of the questions of each version
+    """
+    register_font(HEBREW_FONT)
+    n_questions = (num_questions // NCOLS) * NCOLS
+    versions = [generate_questions(operation, number_range, n_questions, version_seed, **constraints)
+                for version_seed in np.random.SeedSequence(seed).spawn(n_versions)]
+
+    # A single version isn't numbered:
+    numbers = list(range(1, n_versions + 1)) if n_versions > 1 else [None]
+    sections = [_worksheet_elements(title, operation, number_range, num_questions, direction, invert_title_text,
+                                    questions=questions, renderer=renderer, version=version)
+                for version, questions in zip(numbers, versions)]
+    if answer_keys:
+        sections += [_answer_key_elements(title, questions, invert_title_text, renderer, version)
+                     for version, questions in zip(numbers, versions)]
+    _build_pdf(sections, output_pdf)
+    return versions
+
+def _build_pdf(sections, output_pdf):
+    # Build one document of the sections (lists of flowables), each starting on a new page
+    doc = SimpleDocTemplate(output_pdf, pagesize=letter)
+    story = []
+    for section in sections:
+        if story:
+            story.append(PageBreak())
+        story.extend(section)
 
     doc.build(story)
 
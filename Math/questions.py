@@ -0,0 +1,133 @@
+"""
+Generate arithmetic questions in batches with NumPy, for the worksheets and for question banks.
+
+The operands of many questions are drawn at once, the questions that break a constraint are dropped, and more are
+drawn until there are enough:
+
+    questions = generate_questions('minus', 100, 5000, seed=7, regroup=False, distinct=True)
+    for num1, symbol, num2, answer in questions:
+        ...
+"""
+from collections import namedtuple
+
+import numpy as np
+
+OPERATIONS = {
+    'plus': ('+', np.add),
+    'minus': ('-', np.subtract),
+    'times': ('×', np.multiply),
+}
+
+# The batches are larger than the number of questions still needed, as some are dropped by the constraints:
+_OVERSAMPLE = 2
+_MIN_BATCH = 256
+_MAX_ROUNDS = 50
+
+Question = namedtuple('Question', ['num1', 'symbol', 'num2', 'answer'])
+
+
+def has_carry(num1, num2):
+    """
+    Which additions need a carry (some digits add up to 10 or more)
+    :param num1: An array of non-negative integers
+    :param num2: An array of non-negative integers
+    :return: A boolean array
+    """
+    res = np.zeros(np.shape(num1), dtype=bool)
+    num1, num2 = np.asarray(num1), np.asarray(num2)
+    while np.any((num1 > 0) & (num2 > 0)):
+        res |= (num1 % 10 + num2 % 10) >= 10
+        num1, num2 = num1 // 10, num2 // 10
+    return res
+
+
+def has_borrow(num1, num2):
+    """
+    Which subtractions num1 - num2 (with num1 >= num2) need a borrow (some digit of num2 is larger than num1's)
+    :param num1: An array of non-negative integers
+    :param num2: An array of non-negative integers
+    :return: A boolean array
+    """
+    res = np.zeros(np.shape(num1), dtype=bool)
+    num1, num2 = np.asarray(num1), np.asarray(num2)
+    while np.any(num2 > 0):
+        res |= (num1 % 10) < (num2 % 10)
+        num1, num2 = num1 // 10, num2 // 10
+    return res
+
+
+def _draw(rng, number_range, size, ordered):
+    num2 = rng.integers(1, number_range + 1, size)
+    low = num2 if ordered else 1
+    num1 = rng.integers(low, number_range + 1, size)
+    return num1, num2
+
+
+def generate_question_arrays(operation, number_range, num_questions, seed=None, regroup=None, min_result=None,
+                             max_result=None, distinct=False, ordered=True):
+    """
+    Generate questions as arrays (see generate_questions for the parameters)
+    :return: The arrays num1, num2 and answer, each of num_questions integers
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation {operation}")
+    if regroup is not None and operation == 'times':
+        raise ValueError("regroup applies to plus and minus questions only")
+    # With ordered questions num1 >= num2, so only about half of the pairs can be drawn:
+    max_distinct = number_range * (number_range + 1) // 2 if ordered else number_range * number_range
+    if distinct and num_questions > max_distinct:
+        raise ValueError(f"There are fewer than {num_questions} distinct questions up to {number_range}")
+    op = OPERATIONS[operation][1]
+    rng = np.random.default_rng(seed)
+
+    num1 = np.empty(0, dtype=np.int64)
+    num2 = np.empty(0, dtype=np.int64)
+    for _ in range(_MAX_ROUNDS):
+        missing = num_questions - len(num1)
+        if missing <= 0:
+            break
+        a, b = _draw(rng, number_range, max(_MIN_BATCH, _OVERSAMPLE * missing), ordered)
+        answer = op(a, b)
+        keep = np.ones(len(a), dtype=bool)
+        if min_result is not None:
+            keep &= answer >= min_result
+        if max_result is not None:
+            keep &= answer <= max_result
+        if regroup is not None:
+            # Subtractions with num1 < num2 (if not ordered) don't have a simple borrow - keep them out:
+            regrouped = has_carry(a, b) if operation == 'plus' else has_borrow(a, b) | (a < b)
+            keep &= regrouped == regroup
+        num1 = np.concatenate([num1, a[keep]])
+        num2 = np.concatenate([num2, b[keep]])
+        if distinct:
+            # Keep the first of each question, in the order drawn:
+            _, first = np.unique(num1 * (number_range + 1) + num2, return_index=True)
+            first.sort()
+            num1, num2 = num1[first], num2[first]
+    if len(num1) < num_questions:
+        raise ValueError(f"Found only {len(num1)} of {num_questions} questions that meet the constraints")
+
+    num1, num2 = num1[:num_questions], num2[:num_questions]
+    return num1, num2, op(num1, num2)
+
+
+def generate_questions(operation, number_range, num_questions, seed=None, regroup=None, min_result=None,
+                       max_result=None, distinct=False, ordered=True):
+    """
+    Generate random questions
+    :param operation: 'plus', 'minus' or 'times'
+    :param number_range: The largest number in the questions. The numbers are from 1 to number_range
+    :param num_questions: The number of questions
+    :param seed: The random seed. The same seed gives the same questions
+    :param regroup: For plus and minus - None for any question, False for questions without a carry (or borrow), True
+        for questions with one (harder)
+    :param min_result: If not None, the smallest answer allowed
+    :param max_result: If not None, the largest answer allowed
+    :param distinct: If True, no question is repeated
+    :param ordered: If True num1 >= num2 (so subtractions are not negative)
+    :return: A list of Question tuples (num1, symbol, num2, answer)
+    """
+    num1, num2, answer = generate_question_arrays(operation, number_range, num_questions, seed, regroup, min_result,
+                                                  max_result, distinct, ordered)
+    symbol = OPERATIONS[operation][0]
+    return [Question(a, symbol, b, c) for a, b, c in zip(num1.tolist(), num2.tolist(), answer.tolist())]
@@ -0,0 +1,114 @@
+"""
+Generate stories for many topics at once - e.g. a term's worth - and save them to the DB.
+
+The story pipelines run in a bounded pool of threads, so only a few run at once. Each pipeline generates the text and
+then makes its title, questions and image calls in parallel, so up to 3 * max_concurrency model calls run at once. Model
+calls that fail on a rate limit are retried with a growing delay (see TextAndQuestionsGenerator). The stories are saved
+as they finish, a chunk at a time in one transaction each, so the stories that are done are kept if the batch stops.
+
+Run from the ReadingComp directory, with a topic on each line of the topics file:
+    python -m backend.batch topics.txt -v frontend/vocab.txt -c 4 -s 10
+    python -m backend.batch topics.txt --fake  # With the local FakeLLM, no network
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from backend.database.crud import DatabaseManager
+from backend.database.models import Story
+
+
+class StoryResult(BaseModel):
+    topic: str
+    story: Story | None = None
+    error: str | None = None
+
+
+DEFAULT_CHUNK_SIZE = 10
+
+
+def _save_stories(db: DatabaseManager, done: list[StoryResult]):
+    # Add the stories of the results to the DB, in one transaction, and set their ids
+    ids = db.add_stories([res.story for res in done])
+    for res, story_id in zip(done, ids):
+        res.story.id = story_id
+
+
+def generate_stories(text_gen, topics: list[str], vocabulary: str, max_concurrency: int = 4,
+                     db: Optional[DatabaseManager] = None,
+                     on_done: Optional[Callable[[StoryResult], None]] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> list[StoryResult]:
+    """
+    Generate a story for each topic.
+
+    Args:
+    text_gen: The TextAndQuestionsGenerator. Give it max_retries to retry the model calls on rate limits.
+    topics: The topics.
+    vocabulary: The comma separated vocabulary words, for all the stories.
+    max_concurrency: The maximal number of stories generated at once. Each story makes up to 3 model calls at once
+        (its title, questions and image), so up to 3 * max_concurrency calls run at once - set it by the rate limits.
+    db: If not None, the stories are added to this DB as they finish, chunk_size stories in each transaction, and get
+        their ids.
+    on_done: Called with each result when its story is done (in the order they finish), before it is added to the DB.
+    chunk_size: The number of finished stories added to the DB together.
+
+    Returns:
+    A StoryResult for each topic, in the order of the topics. A story that failed has the error instead.
+    """
+    results = [StoryResult(topic=topic) for topic in topics]
+    unsaved = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {executor.submit(text_gen.invoke, {"topic": topic, "vocabulary": vocabulary}): i
+                   for i, topic in enumerate(topics)}
+        for future in as_completed(futures):
+            res = results[futures[future]]
+            try:
+                res.story = future.result()
+            except Exception as e:
+                res.error = f"{type(e).__name__}: {e}"
+            if on_done is not None:
+                on_done(res)
+            if db is not None and res.story is not None:
+                unsaved.append(res)
+                if len(unsaved) >= chunk_size:
+                    _save_stories(db, unsaved)
+                    unsaved = []
+
+    if unsaved:
+        _save_stories(db, unsaved)
+    return results
+
+
+if __name__ == "__main__":
+    from backend.text_generator import TextAndQuestionsGenerator
+    from backend.response_cache import ResponseCache
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("topics_file", type=str, help="A text file with a topic on each line")
+    parser.add_argument("-v", "--vocab_file", type=str, default="frontend/vocab.txt", help="Comma separated vocabulary")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Number of stories generated at once")
+    parser.add_argument("-s", "--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Number of finished stories saved to the DB together")
+    parser.add_argument("-r", "--retries", type=int, default=5, help="Number of retries of a rate limited call")
+    parser.add_argument("--fake", action="store_true", help="Use the local FakeLLM instead of Gemini")
+    parser.add_argument("--no_db", action="store_true", help="Don't save the stories to the DB")
+    args = parser.parse_args()
+
+    with open(args.topics_file, "r") as file:
+        topics = [line.strip() for line in file if line.strip()]
+    with open(args.vocab_file, "r") as file:
+        vocabulary = ', '.join(v.strip() for v in file.read().strip().split(","))
+
+    if args.fake:
+        from backend.fake_llm import FakeLLM, fake_image
+        text_gen = TextAndQuestionsGenerator(llm=FakeLLM(), image_generator=fake_image, max_retries=args.retries)
+    else:
+        text_gen = TextAndQuestionsGenerator(cache=ResponseCache.from_env(), max_retries=args.retries)
+
+    results = generate_stories(text_gen, topics, vocabulary, args.concurrency,
+                               db=None if args.no_db else DatabaseManager(),
+                               on_done=lambda res: print(f"{res.topic}: {res.error or res.story.title}"),
+                               chunk_size=args.chunk_size)
+    print(f"{sum(res.story is not None for res in results)} of {len(results)} stories generated")
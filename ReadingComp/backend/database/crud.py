@@ -2,11 +2,13 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from backend.database.models import SQLALCHEMY_DATABASE_URL, StoryDB, QuestionDB, Story, Question, create_database
+from backend.image_store import ImageStore
 
 
 class DatabaseManager:
-    def __init__(self):
-        self.engine = create_database()
+    def __init__(self, image_store: ImageStore | None = None):
+        self.image_store = image_store or ImageStore()
+        self.engine = create_database(self.image_store)
         #  = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
@@ -19,27 +21,35 @@ class DatabaseManager:
         with self.SessionLocal() as session:
             db_story = session.query(StoryDB).filter(StoryDB.id == story_id).first()
             if db_story:
-                return Story.from_db(db_story)
+                return Story.from_db(db_story, self.image_store)
             return None
 
     def add_story(self, story: Story):
+        self.add_stories([story])
+
+    def add_stories(self, stories: list[Story]) -> list[int]:
+        """
+        Add stories and their questions in one transaction
+
+        Returns:
+        The ids of the new stories.
+        """
         with self.SessionLocal() as session:
-            db_story = story.to_db()
-            session.add(db_story)
+            # Story.to_db includes the questions - they are inserted with their story:
+            db_stories = [story.to_db(self.image_store) for story in stories]
+            session.add_all(db_stories)
             session.commit()
-            session.refresh(db_story)
-            
-            # Add questions to the DB
-            for question in story.questions:
-                db_question = question.to_db(db_story.id)
-                session.add(db_question)
-            session.commit()     
+            return [db_story.id for db_story in db_stories]
 
     def delete_story_by_id(self, story_id: int) -> bool:
         with self.SessionLocal() as session:
             db_story = session.query(StoryDB).filter(StoryDB.id == story_id).first()
             if db_story:
+                image_hash = db_story.image_hash
                 session.delete(db_story)
                 session.commit()
+                # The same image may be used by another story:
+                if image_hash and not session.query(StoryDB.id).filter(StoryDB.image_hash == image_hash).first():
+                    self.image_store.delete(image_hash)
                 return True
             return False
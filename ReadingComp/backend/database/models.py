@@ -2,10 +2,13 @@ import datetime
 from enum import StrEnum
 from typing import Optional
 
-from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Text, JSON, DateTime, ForeignKey, LargeBinary
+from pydantic import BaseModel, PrivateAttr
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Text, JSON, DateTime, ForeignKey
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import declarative_base, relationship
 
+from backend.image_store import ImageStore
+
 # SQLAlchemy setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./stories.db"
 
@@ -20,7 +23,7 @@ class StoryDB(Base):
     title = Column(String, index=True)
     content = Column(Text)
     created_at = Column(DateTime, default=datetime.datetime.now(datetime.UTC))
-    image_bytes = Column(LargeBinary)
+    image_hash = Column(String(64))  # The image is in the ImageStore
 
     questions = relationship("QuestionDB", back_populates="story")
 
@@ -72,32 +75,95 @@ class Story(BaseModel):
     title: str | None = None
     content: str | None = None
     created_at: datetime.datetime | None = None
-    image_bytes: bytes | None = None
+    image_bytes: bytes | None = None  # The image of a new story. Saved stories have the image_hash instead
+    image_hash: str | None = None
     questions: list[Question] = []
 
+    _image_store: ImageStore | None = PrivateAttr(default=None)
+
     @staticmethod
-    def from_db(db_story: StoryDB) -> 'Story':
-        return Story(
+    def from_db(db_story: StoryDB, image_store: ImageStore | None = None) -> 'Story':
+        story = Story(
             id=db_story.id,
             title=db_story.title,
             content=db_story.content,
             created_at=db_story.created_at,
-            image_bytes=db_story.image_bytes,
+            image_hash=db_story.image_hash,
             questions=[Question.from_db(q) for q in db_story.questions]
         )
+        story._image_store = image_store  # The image is read from it when needed
+        return story
 
-    def to_db(self) -> StoryDB:
+    def to_db(self, image_store: ImageStore | None = None) -> StoryDB:
+        if self.image_bytes is not None:
+            self._image_store = image_store or self._image_store or ImageStore()
+            self.image_hash = self._image_store.put(self.image_bytes)
         return StoryDB(
             id=self.id,
             title=self.title,
             content=self.content,
             created_at=self.created_at,
-            image_bytes=self.image_bytes,
+            image_hash=self.image_hash,
             questions=[q.to_db(self.id) for q in self.questions]
         )
 
+    @property
+    def has_image(self) -> bool:
+        return self.image_bytes is not None or self.image_hash is not None
+
+    def load_image(self) -> bytes | None:
+        """
+        The image bytes - of a saved story, read from the image store
+        """
+        if self.image_bytes is not None or self.image_hash is None:
+            return self.image_bytes
+        return (self._image_store or ImageStore()).get(self.image_hash)
+
+    def load_thumbnail(self) -> bytes | None:
+        """
+        A small version of the image, to show on the page (see ImageStore.thumbnail)
+        """
+        if self.image_bytes is not None or self.image_hash is None:
+            return self.image_bytes
+        return (self._image_store or ImageStore()).thumbnail(self.image_hash)
+
 
-def create_database():
+def create_database(image_store: ImageStore | None = None):
     engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
     Base.metadata.create_all(engine, checkfirst=True)
-    return engine
\ No newline at end of file
+    migrate_image_blobs(engine, image_store or ImageStore())
+    return engine
+
+
+def migrate_image_blobs(engine, image_store: ImageStore) -> int:
+    """
+    Move the images of a DB made before the image store (in the stories.image_bytes column) to the store, one at a
+    time, and drop the column
+
+    Returns:
+    The number of images moved.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("stories")}
+    if "image_bytes" not in columns:
+        return 0
+
+    with engine.begin() as conn:
+        if "image_hash" not in columns:
+            conn.execute(text("ALTER TABLE stories ADD COLUMN image_hash VARCHAR(64)"))
+        story_ids = conn.execute(text("SELECT id FROM stories WHERE image_bytes IS NOT NULL")).scalars().all()
+        if not story_ids:
+            # Moved already, but SQLite before 3.35 left the empty column - don't try to drop it and VACUUM every time
+            return 0
+        for story_id in story_ids:
+            image_bytes = conn.execute(text("SELECT image_bytes FROM stories WHERE id = :id"),
+                                       {"id": story_id}).scalar()
+            conn.execute(text("UPDATE stories SET image_hash = :image_hash, image_bytes = NULL WHERE id = :id"),
+                         {"image_hash": image_store.put(image_bytes), "id": story_id})
+        try:
+            conn.execute(text("ALTER TABLE stories DROP COLUMN image_bytes"))
+        except OperationalError:
+            pass  # SQLite before 3.35 can't drop columns - the column is left empty
+    # Give the space of the moved blobs back:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    return len(story_ids)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from docx import Document
 from docx.shared import Inches
+from io import BytesIO
 import tempfile
 
 from backend.database.models import Story
@@ -13,19 +14,17 @@ class DocxGenerator:
         doc.add_heading(story.title, level=1)
 
         # Add text and image with square wrap and right alignment
-        if story.image_bytes:
+        image_bytes = story.load_image()
+        if image_bytes:
             # Add text
             text_paragraph = doc.add_paragraph(story.content)
             
             # Add image with right alignment and square wrap
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-                tmp_file.write(story.image_bytes)
-                tmp_file_path = tmp_file.name
-                run = text_paragraph.add_run()
-                run.add_picture(tmp_file_path, width=Inches(3.0))
-                
-                last_paragraph = doc.paragraphs[-1]
-                last_paragraph.runs[-1].add_break()
+            run = text_paragraph.add_run()
+            run.add_picture(BytesIO(image_bytes), width=Inches(3.0))
+
+            last_paragraph = doc.paragraphs[-1]
+            last_paragraph.runs[-1].add_break()
         else:
             # Add text if no image is present
             doc.add_paragraph(story.content)
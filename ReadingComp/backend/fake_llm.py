@@ -0,0 +1,79 @@
+"""
+Local stand-ins for the Gemini models, to run the story pipeline (and the batch generation) with no network or API key:
+
+    text_gen = TextAndQuestionsGenerator(llm=FakeLLM(), image_generator=fake_image)
+
+FakeLLM answers each prompt of TextAndQuestionsGenerator with a made-up response of the right form - a story about the
+topic, a title, or the questions JSON. It can wait before answering, and fail some calls with a rate limit error, to
+test the concurrency and the retries.
+"""
+import json
+import re
+import threading
+import time
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Optional
+
+from PIL import Image, ImageDraw
+
+from backend.prompts import QUESTIONS_PROMPT
+
+FAKE_QUESTIONS = [
+    {"question": "What is the story about?", "type": "multiple_choice",
+     "options": ["A trip", "A game", "A meal", "A dream"], "correct_answer": "A trip"},
+    {"question": "The story has a happy end.", "type": "yes_no", "options": ["Yes", "No"], "correct_answer": "Yes"},
+    {"question": "What do you like in the story?", "type": "open", "correct_answer": "Any answer"},
+]
+
+
+class FakeRateLimitError(Exception):
+    """
+    A rate limit error, like the API's 429 RESOURCE_EXHAUSTED
+    """
+    code = 429
+
+
+class FakeLLM:
+    model = "fake-llm"
+
+    def __init__(self, delay: float = 0.0, rate_limit_every: int = 0):
+        """
+        Args:
+        delay: The time in seconds each call takes.
+        rate_limit_every: If > 0, every rate_limit_every-th call fails with FakeRateLimitError.
+        """
+        self.delay = delay
+        self.rate_limit_every = rate_limit_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.rate_limit_every and calls % self.rate_limit_every == 0:
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+
+        prompt = "\n".join(message.content for message in messages)
+        if QUESTIONS_PROMPT in prompt:
+            content = json.dumps(FAKE_QUESTIONS)
+        elif "engaging title" in prompt:
+            content = "A Fake Story"
+        else:
+            topic = re.search(r"TOPIC: (.*)\.", prompt)
+            topic = topic.group(1) if topic else "something"
+            content = f"This is a short story about {topic}. It is a nice day, and everyone is happy. The end."
+        return SimpleNamespace(content=content)
+
+
+def fake_image(story_content: str, cache=None) -> Optional[bytes]:
+    """
+    A small PNG in place of generate_sketch_cartoon (same arguments)
+    """
+    image = Image.new("RGB", (256, 256), "white")
+    ImageDraw.Draw(image).text((10, 120), story_content[:30], fill="black")
+    data = BytesIO()
+    image.save(data, "PNG")
+    return data.getvalue()
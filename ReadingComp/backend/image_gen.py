@@ -7,30 +7,39 @@ from io import BytesIO
 import os
 import base64
 
+from backend.response_cache import ResponseCache
+
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY is None:
-    raise ValueError("GOOGLE_API_KEY not found in .env file or environment variables.")
+
+IMAGE_MODEL = "models/gemini-2.0-flash-exp-image-generation"
 
 
-def generate_sketch_cartoon(story_content: str):
+def generate_sketch_cartoon(story_content: str, cache: ResponseCache | None = None):
     """
     Generates a black and white sketch cartoon image based on a given story content.
 
     Args:
     story_content: The text content of the story.
-    api_key: Your Google Cloud API key.
+    cache: If not None, the image is taken from the cache when the same prompt was sent before.
 
     Returns:
-    A PIL Image object representing the generated image.
+    The bytes of the generated image, or None.
     """
     # Craft a detailed prompt for the image generation model
     prompt = IMAGE_PROMPT.format(story_content=story_content)
+    if cache is not None:
+        return cache.cached(IMAGE_MODEL, prompt, lambda: _generate_image(prompt))
+    return _generate_image(prompt)
+
 
+def _generate_image(prompt: str):
+    if GOOGLE_API_KEY is None:
+        raise ValueError("GOOGLE_API_KEY not found in .env file or environment variables.")
     client = genai.Client(api_key=GOOGLE_API_KEY)
 
     response = client.models.generate_content(
-        model="models/gemini-2.0-flash-exp-image-generation",
+        model=IMAGE_MODEL,
         contents=prompt,
         config=types.GenerateContentConfig(
             response_modalities=['Text', 'Image']
@@ -0,0 +1,104 @@
+"""
+The story images, stored as files named by the hash of their content. The DB keeps only the hash of a story's image,
+so the stories table stays small and an image is read only when it is shown. The same image is stored once, and its
+thumbnail (for the page) is made once, the first time it is needed.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+DEFAULT_IMAGE_DIR = "./images"
+THUMBNAIL_HEIGHT = 400  # The height the page shows the images at
+
+
+class ImageStore:
+    def __init__(self, root: str = DEFAULT_IMAGE_DIR, thumbnail_height: int = THUMBNAIL_HEIGHT):
+        """
+        Args:
+        root: The directory of the image files. Created if it doesn't exist.
+        thumbnail_height: The maximal height of the thumbnails, in pixels.
+        """
+        self.root = root
+        self.thumbnail_height = thumbnail_height
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, image_hash: str) -> str:
+        return os.path.join(self.root, image_hash[:2], image_hash)
+
+    def thumbnail_path(self, image_hash: str) -> str:
+        return os.path.join(self.root, "thumbnails", image_hash[:2], f"{image_hash}-{self.thumbnail_height}.png")
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Write to a temporary file and rename it, so a file is never read half written
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, data: bytes) -> str:
+        """
+        Store an image, unless the same image is stored already.
+
+        Returns:
+        The hash of the image, to get it with.
+        """
+        image_hash = self.hash(data)
+        path = self.path(image_hash)
+        if not os.path.exists(path):
+            self._write(path, data)
+        return image_hash
+
+    def get(self, image_hash: str) -> bytes | None:
+        """
+        Returns:
+        The image bytes, or None if there is no such image.
+        """
+        try:
+            with open(self.path(image_hash), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def thumbnail(self, image_hash: str) -> bytes | None:
+        """
+        Returns:
+        A PNG of the image, at most thumbnail_height high (the image itself if it is small), or None if there is no such
+        image.
+        """
+        path = self.thumbnail_path(image_hash)
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+
+        data = self.get(image_hash)
+        if data is None:
+            return None
+        image = Image.open(BytesIO(data))
+        if image.height <= self.thumbnail_height:
+            return data
+        image.thumbnail((image.width, self.thumbnail_height))
+        thumbnail = BytesIO()
+        image.save(thumbnail, "PNG", optimize=True)
+        self._write(path, thumbnail.getvalue())
+        return thumbnail.getvalue()
+
+    def delete(self, image_hash: str):
+        """
+        Delete an image and its thumbnail - when no story uses it any more.
+        """
+        for path in (self.path(image_hash), self.thumbnail_path(image_hash)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,147 @@
+"""
+A persistent cache of the responses of the LLM and image models.
+
+Responses are stored on disk by the hash of the model name and the full prompt, so the same prompt is answered from
+the cache without calling the model. The cache is bounded in size: when it grows past max_bytes, the least recently
+used responses are removed. In offline mode only the cache is used - a prompt that isn't cached raises CacheMissError,
+so tests and demos can replay stored responses with no network.
+
+It is configured with environment variables (or the .env file):
+    RESPONSE_CACHE_DIR - the cache directory. Not set: no cache
+    RESPONSE_CACHE_MAX_MB - the maximal size of the cache, in MB (default 500)
+    RESPONSE_CACHE_OFFLINE - 1 to answer only from the cache
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+DEFAULT_MAX_MB = 500
+
+
+class CacheMissError(LookupError):
+    """
+    The response isn't in the cache, and the cache is offline
+    """
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024, offline: bool = False):
+        """
+        Args:
+        cache_dir: The directory of the cache files. Created if it doesn't exist.
+        max_bytes: The maximal total size of the cached responses.
+        offline: If True, never call the models - only answer from the cache.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()  # The story nodes run in parallel threads
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def from_env() -> Optional['ResponseCache']:
+        """
+        The cache configured by the environment variables (see the module doc), or None if RESPONSE_CACHE_DIR is not set.
+        """
+        load_dotenv()
+        cache_dir = os.getenv("RESPONSE_CACHE_DIR")
+        if not cache_dir:
+            return None
+        max_mb = float(os.getenv("RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_MB))
+        offline = os.getenv("RESPONSE_CACHE_OFFLINE", "0").lower() in ("1", "true", "yes")
+        return ResponseCache(cache_dir, int(max_mb * 1024 * 1024), offline)
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(json.dumps([model, prompt], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _entries(self):
+        # (path, size, last used time) of every cached response
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.startswith("."):
+                    continue  # A file being written
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def get(self, model: str, prompt: str) -> Optional[bytes]:
+        """
+        Returns:
+        The cached response to the prompt, or None if it isn't cached.
+        """
+        path = self._path(self.key(model, prompt))
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # Used now - evicted last
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put(self, model: str, prompt: str, data: bytes):
+        """
+        Cache the response to a prompt, and remove the least recently used responses if the cache is too large.
+        """
+        path = self._path(self.key(model, prompt))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename it, so a response is never read half written:
+        fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Remove the least recently used responses until the cache is down to 90% of max_bytes
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= 0.9 * self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def cached(self, model: str, prompt: str, generate: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        The cached response to the prompt, or else generate it and cache it. A None response is not cached.
+
+        Args:
+        model: The model name.
+        prompt: The full prompt sent to the model.
+        generate: Calls the model and returns the response.
+
+        Returns:
+        The response.
+        """
+        data = self.get(model, prompt)
+        if data is not None:
+            return data
+        if self.offline:
+            raise CacheMissError(f"No cached response of {model} to this prompt, and the cache is offline")
+        data = generate()
+        if data is not None:
+            self.put(model, prompt, data)
+        return data
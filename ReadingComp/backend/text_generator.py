@@ -1,24 +1,65 @@
 import os
+import random
+import time
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, List, Annotated, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Annotated, Optional, Tuple
 import json
 from pydantic import BaseModel, Field
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from google.api_core.exceptions import NotFound
+from google.api_core.exceptions import NotFound, ResourceExhausted
 
 from backend.image_gen import generate_sketch_cartoon
+from backend.response_cache import ResponseCache
 from backend.prompts import TEXT_GENERATION_PROMPT, TEXT_STYLE_PROMPT, QUESTIONS_PROMPT, IMAGE_PROMPT
 from backend.database.models import Story, Question, SQLALCHEMY_DATABASE_URL
 
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY is None:
-    raise ValueError("GOOGLE_API_KEY not found in .env file or environment variables.")
+
+TEXT_MODEL = "models/gemini-2.0-flash"
+
+
+# The events of TextAndQuestionsGenerator.astream:
+EVENT_TEXT_TOKEN = "text_token"  # A chunk of the story text (str)
+EVENT_TEXT = "text"  # The whole story text (str)
+EVENT_TITLE = "title"  # str
+EVENT_QUESTIONS = "questions"  # list[Question]
+EVENT_IMAGE = "image"  # The PNG bytes, or None
+EVENT_STORY = "story"  # The Story, last
+
+
+def is_rate_limit(error: Exception) -> bool:
+    """
+    Is the error a rate limit (or quota) error of the model API - worth retrying later
+    """
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return isinstance(error, ResourceExhausted) or code == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def call_with_retry(func: Callable[[], Any], max_retries: int = 0, base_delay: float = 2.0):
+    """
+    Call func, and call it again after a growing delay (exponential backoff, with jitter) while it fails on a rate limit
+
+    Args:
+    func: The function to call, with no arguments.
+    max_retries: The number of times to retry. Other errors are raised right away.
+    base_delay: The delay in seconds before the first retry. It doubles with every retry.
+
+    Returns:
+    The return value of func.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit(e):
+                raise
+            time.sleep(base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
 
 
 def clean_json(json_text):
@@ -37,10 +78,49 @@ class GraphState(BaseModel):
 
 
 class TextAndQuestionsGenerator:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="models/gemini-2.0-flash", google_api_key=GOOGLE_API_KEY)
+    def __init__(self, cache: Optional[ResponseCache] = None, llm=None, image_generator: Optional[Callable] = None,
+                 max_retries: int = 0, base_delay: float = 2.0):
+        """
+        Args:
+        cache: If not None, the responses of the models are cached, and taken from the cache for the same prompts.
+            An offline cache never calls the models (no API key is needed).
+        llm: The chat model to use instead of Gemini (e.g. backend.fake_llm.FakeLLM).
+        image_generator: The function to draw the image instead of generate_sketch_cartoon, with the same arguments.
+        max_retries: The number of times to retry a model call that failed on a rate limit (see call_with_retry).
+        base_delay: The delay in seconds before the first retry.
+        """
+        self.cache = cache
+        self.image_generator = image_generator or generate_sketch_cartoon
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        if llm is not None:
+            self.llm = llm
+        elif cache is not None and cache.offline:
+            self.llm = None
+        else:
+            if GOOGLE_API_KEY is None:
+                raise ValueError("GOOGLE_API_KEY not found in .env file or environment variables.")
+            self.llm = ChatGoogleGenerativeAI(model=TEXT_MODEL, google_api_key=GOOGLE_API_KEY)
+        # The cache keys have the model name, so another model doesn't get Gemini's responses:
+        self.model_name = getattr(self.llm, "model", None) or TEXT_MODEL
         self.workflow = self.build_langgraph()
 
+    def invoke_llm(self, messages) -> str:
+        """
+        Send the messages to the LLM (or take its response from the cache)
+
+        Returns:
+        The content of the response.
+        """
+        def call_llm():
+            return call_with_retry(lambda: self.llm.invoke(messages).content, self.max_retries, self.base_delay)
+
+        if self.cache is None:
+            return call_llm()
+        prompt = "\n\n".join(f"{message.type}: {message.content}" for message in messages)
+        data = self.cache.cached(self.model_name, prompt, lambda: call_llm().encode("utf-8"))
+        return data.decode("utf-8")
+
     def build_langgraph(self):
         text_generation_prompt = ChatPromptTemplate.from_template(
             """
@@ -75,24 +155,25 @@ class TextAndQuestionsGenerator:
         )
 
         def generate_text(state: GraphState):
-            result = self.llm.invoke(text_generation_prompt.format_messages(TEXT_GENERATION_PROMPT=TEXT_GENERATION_PROMPT, 
+            result = self.invoke_llm(text_generation_prompt.format_messages(TEXT_GENERATION_PROMPT=TEXT_GENERATION_PROMPT, 
                                                                             TEXT_STYLE_PROMPT=TEXT_STYLE_PROMPT, 
                                                                             topic=state.topic,
                                                                             vocabulary=state.vocabulary))
-            return {"text": result.content}
+            return {"text": result}
 
         def generate_questions(state: GraphState):
-            result = self.llm.invoke(question_generation_prompt.format_messages(QUESTIONS_PROMPT=QUESTIONS_PROMPT, text=state.text))
-            questions = json.loads(clean_json(result.content))
+            result = self.invoke_llm(question_generation_prompt.format_messages(QUESTIONS_PROMPT=QUESTIONS_PROMPT, text=state.text))
+            questions = json.loads(clean_json(result))
             return {"questions": questions}
 
         def generate_title(state: GraphState):
-            result = self.llm.invoke(title_generation_prompt.format_messages(text=state.text))
-            return {"title": result.content}
+            result = self.invoke_llm(title_generation_prompt.format_messages(text=state.text))
+            return {"title": result}
             
 
         def generate_image(state: GraphState):
-            image_bytes = generate_sketch_cartoon(story_content=state.text)
+            image_bytes = call_with_retry(lambda: self.image_generator(story_content=state.text, cache=self.cache),
+                                          self.max_retries, self.base_delay)
             return {"image_bytes": image_bytes}
         
 
@@ -102,10 +183,11 @@ class TextAndQuestionsGenerator:
         workflow.add_node("generate_title", generate_title)
         workflow.add_node("generate_image", generate_image)
 
-        workflow.add_edge("generate_text", "generate_title")
-        workflow.add_edge("generate_title", "generate_questions")
-        workflow.add_edge("generate_questions", "generate_image")
-        workflow.add_edge("generate_image", END)
+        # The title, questions and image only need the text - they fan out after it. LangGraph runs the nodes of a
+        # step concurrently (in a thread pool), so this takes text + the slowest of the three, not the sum:
+        for node in ("generate_title", "generate_questions", "generate_image"):
+            workflow.add_edge("generate_text", node)
+            workflow.add_edge(node, END)
 
         workflow.set_entry_point("generate_text")
         return workflow.compile()
@@ -120,6 +202,42 @@ class TextAndQuestionsGenerator:
         image_bytes = res.get("image_bytes")
         story = Story(title=title, content=story_data, questions=[Question(**q) for q in questions_data], image_bytes=image_bytes)
         return story
+
+    async def astream(self, request: dict) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate a story like invoke, sending each part as soon as it is ready: the tokens of the text while it is
+        written, then the title, questions and image in the order they finish, and the whole Story last.
+
+            async for event, value in text_gen.astream(request):
+                if event == EVENT_TEXT_TOKEN:
+                    ...
+
+        :param request: The topic and vocabulary, as for invoke
+        :return: An async iterator of (event, value) tuples - see the EVENT_ constants
+        """
+        res = {}
+        async for mode, chunk in self.workflow.astream(request, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                # The tokens of the LLM calls - only the story text is shown while it is written:
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == "generate_text" and message.content:
+                    yield EVENT_TEXT_TOKEN, message.content
+                continue
+
+            for node, update in chunk.items():
+                res.update(update)
+                if node == "generate_text":
+                    yield EVENT_TEXT, update["text"]
+                elif node == "generate_title":
+                    yield EVENT_TITLE, update["title"]
+                elif node == "generate_questions":
+                    yield EVENT_QUESTIONS, [Question(**q) for q in update["questions"]]
+                elif node == "generate_image":
+                    yield EVENT_IMAGE, update["image_bytes"]
+
+        yield EVENT_STORY, Story(title=res.get("title"), content=res.get("text"),
+                                 questions=[Question(**q) for q in res.get("questions", [])],
+                                 image_bytes=res.get("image_bytes"))
         
     
     def save_to_db(self, state: GraphState):
@@ -1,42 +1,32 @@
+import asyncio
+
 import streamlit as st
 from sqlfluff.dialects.dialect_soql import DateLiteralNSegment
 
-from backend.database.models import Story
-from backend.text_generator import TextAndQuestionsGenerator
+from backend.database.models import Story, Question
+from backend.text_generator import TextAndQuestionsGenerator, EVENT_TEXT_TOKEN, EVENT_TEXT, EVENT_TITLE, \
+    EVENT_QUESTIONS, EVENT_IMAGE, EVENT_STORY
 from backend.database.crud import DatabaseManager
+from backend.response_cache import ResponseCache
 from backend.docx_generator import DocxGenerator
 from PIL import Image
 from io import BytesIO
-import tempfile
 
 
 st.set_page_config(layout="wide")
 
 
-def display_story_results(story: Story, docx_gen: DocxGenerator):
-    
-    # Display story content and image side by side if image is not None
-    if story.image_bytes:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader(story.title)
-            st.write(story.content)
-        with col2:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-                tmp_file.write(story.image_bytes)
-                tmp_file_path = tmp_file.name
-
-                image = Image.open(tmp_file_path)
-                target_height = 400
-                if image.height > target_height:
-                    image.thumbnail((image.width, target_height))
-                st.image(image, caption="Generated Image", use_column_width=True)
-    else:
-        st.subheader(story.title)
-        st.write(story.content)
+def _display_image(image_bytes: bytes):
+    image = Image.open(BytesIO(image_bytes))
+    target_height = 400
+    if image.height > target_height:
+        image.thumbnail((image.width, target_height))
+    st.image(image, caption="Generated Image", use_column_width=True)
 
+
+def _display_questions(questions: list[Question]):
     st.subheader("Questions")
-    for q in story.questions:
+    for q in questions:
         if q.type == "multiple_choice":
             st.write(f"**Question:** {q.question}")
             for option in q.options:
@@ -49,6 +39,8 @@ def display_story_results(story: Story, docx_gen: DocxGenerator):
             st.write(f"**Question:** {q.question}")
             st.write("---")
 
+
+def _display_download(story: Story, docx_gen: DocxGenerator):
     # Generate and provide download button for DOCX
     docx_path = docx_gen.generate(story)
     with open(docx_path, "rb") as file:
@@ -59,6 +51,68 @@ def display_story_results(story: Story, docx_gen: DocxGenerator):
             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         )
 
+
+def display_story_results(story: Story, docx_gen: DocxGenerator):
+    
+    # Display story content and image side by side if image is not None
+    if story.has_image:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader(story.title)
+            st.write(story.content)
+        with col2:
+            # A saved story's thumbnail is made once, and the full image isn't decoded:
+            _display_image(story.load_thumbnail())
+    else:
+        st.subheader(story.title)
+        st.write(story.content)
+
+    _display_questions(story.questions)
+    _display_download(story, docx_gen)
+
+
+def display_story_stream(text_gen: TextAndQuestionsGenerator, request: dict, docx_gen: DocxGenerator) -> Story:
+    """
+    Generate a story and display each part as soon as it is ready (see TextAndQuestionsGenerator.astream): the text
+    while it is written, then the title, questions and image as they finish
+    :return: The generated Story
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        title_area = st.empty()
+        text_area = st.empty()
+    with col2:
+        image_area = st.empty()
+    questions_area = st.empty()
+    title_area.subheader("Writing the story...")
+    image_area.info("Drawing the picture...")
+
+    async def consume() -> Story:
+        text = ""
+        async for event, value in text_gen.astream(request):
+            if event == EVENT_TEXT_TOKEN:
+                text += value
+                text_area.write(text)
+            elif event == EVENT_TEXT:
+                text_area.write(value)
+            elif event == EVENT_TITLE:
+                title_area.subheader(value)
+            elif event == EVENT_QUESTIONS:
+                with questions_area.container():
+                    _display_questions(value)
+            elif event == EVENT_IMAGE:
+                if value:
+                    with image_area.container():
+                        _display_image(value)
+                else:
+                    image_area.empty()
+            elif event == EVENT_STORY:
+                return value
+
+    story = asyncio.run(consume())
+    _display_download(story, docx_gen)
+    return story
+
 def main():
     st.title("EFL Reading Comprehension Helper")
 
@@ -66,7 +120,8 @@ def main():
     if "db" not in st.session_state:
         st.session_state.db = DatabaseManager()
     if "text_gen" not in st.session_state:
-        st.session_state.text_gen = TextAndQuestionsGenerator()
+        # Cache the model responses if RESPONSE_CACHE_DIR is set (see backend.response_cache):
+        st.session_state.text_gen = TextAndQuestionsGenerator(cache=ResponseCache.from_env())
     if "docx_gen" not in st.session_state:
         st.session_state.docx_gen = DocxGenerator()
 
@@ -108,18 +163,14 @@ def main():
         if st.button("Generate Story"):
             request = {"topic": theme, "vocabulary": ', '.join(vocabulary)}
 
-            with st.spinner("Generating story..."):
-                generated_story = text_gen.invoke(request)
-
-                # Save to DB
-                db.add_story(generated_story)
+            # Display the story while it is generated:
+            generated_story = display_story_stream(text_gen, request, docx_gen)
 
-                # Display results
-                st.session_state.current_story = generated_story  # Save the generated story to session state
-                display_story_results(generated_story, docx_gen)
+            # Save to DB
+            db.add_story(generated_story)
 
-                # Save generated story ID to session state
-                st.session_state.current_story = generated_story
+            # Save the generated story to session state
+            st.session_state.current_story = generated_story
     else:
         # If a story is selected from the sidebar, display it
         if selected_story_title:
@@ -0,0 +1,129 @@
+import time
+
+
+class BacktrackSearch(object):
+    """
+    Backtracking search for a crossword layout that places as many of the required words as possible.
+
+    * Most constrained word first - at every step the unplaced word with the fewest legal placements is placed next.
+    * Forward checking - the legal placements of every unplaced word are recomputed against the crossing letters
+      after each placement. A word with no legal placement is not branched on until a later word opens a slot for it.
+    * Early cutoff - a branch stops as soon as the placed words plus all the words still left can't beat the best
+      layout found so far.
+
+    The search works on the grid of the crossword it is given, and leaves its grid empty when done.
+    """
+    def __init__(self, crossword, time_permitted=5.00, branching=4, max_nodes=None, on_best=None):
+        """
+        :param crossword: The Crossword to search in. Its available_words are the words to place, and its random
+            generator is used for all random choices
+        :param time_permitted: The time in seconds we allow this to run
+        :param branching: The number of placements tried for each word (the best scored ones)
+        :param max_nodes: If not None, stop after setting this many words instead of after time_permitted
+        :param on_best: A function called with the placements every time a better layout is found (or None)
+        """
+        self.crossword = crossword
+        self.time_permitted = float(time_permitted)
+        self.branching = branching
+        self.max_nodes = max_nodes
+        self.on_best = on_best
+        self.words = list(crossword.available_words)
+        self.best_placements = []
+        self.nodes = 0  # The number of words set on the grid during the search
+        self.deadline = None
+
+    def run(self):
+        """
+        Run the search until all words are placed or the time is up
+        :return: The placements of the best layout found, as returned by Crossword.get_placements
+        """
+        self.deadline = time.time() + self.time_permitted
+        if not self.words:
+            return self.best_placements
+
+        # Start from the longest word - it has the most letters for others to cross:
+        first = max(self.words, key=lambda w: w.length)
+        rest = [w for w in self.words if w is not first]
+        for col, row, vertical in self._first_word_coords(first):
+            self._place_and_search(col, row, vertical, first, rest)
+            if self._done():
+                break
+        return self.best_placements
+
+    def _first_word_coords(self, word):
+        """
+        Generate start positions for the first word: the center of the grid across and down, then random ones
+        """
+        cw = self.crossword
+        center = [((cw.cols - word.length) // 2 + 1, (cw.rows + 1) // 2, 0),
+                  ((cw.cols + 1) // 2, (cw.rows - word.length) // 2 + 1, 1)]
+        cw.random.shuffle(center)
+        for coord in center:
+            yield coord
+        orientations = [v for v, size in ((0, cw.cols), (1, cw.rows)) if word.length <= size]
+        while orientations:
+            vertical = cw.random.choice(orientations)
+            if vertical:
+                yield cw.random.randrange(1, cw.cols + 1), cw.random.randrange(1, cw.rows - word.length + 2), vertical
+            else:
+                yield cw.random.randrange(1, cw.cols - word.length + 2), cw.random.randrange(1, cw.rows + 1), vertical
+
+    def _done(self):
+        if len(self.best_placements) == len(self.words):
+            return True
+        if self.max_nodes is not None:
+            return self.nodes >= self.max_nodes
+        return time.time() > self.deadline
+
+    def _place_and_search(self, col, row, vertical, word, remaining):
+        cw = self.crossword
+        if not cw.check_fit_score(col, row, vertical, word):
+            return
+        cw.set_word(col, row, vertical, word)
+        self.nodes += 1
+        self._search(remaining)
+        cw.unset_word(word)
+
+    def _search(self, remaining):
+        cw = self.crossword
+        placed = len(cw.current_word_list)
+        if placed > len(self.best_placements):
+            self.best_placements = cw.get_placements()
+            if self.on_best is not None:
+                self.on_best(self.best_placements)
+        if not remaining or self._done():
+            return
+
+        # Forward checking: the legal placements of each remaining word, given the letters on the grid now
+        open_words = []
+        for word in remaining:
+            coords = self._legal_coords(word)
+            if coords:
+                open_words.append((word, coords))
+        if not open_words:
+            return
+
+        # Most constrained first:
+        word, coords = min(open_words, key=lambda wc: len(wc[1]))
+        rest = [w for w in remaining if w is not word]
+        for col, row, vertical in coords[:self.branching]:
+            if placed + len(remaining) <= len(self.best_placements) or self._done():
+                return  # Even placing every remaining word can't beat the best layout
+            self._place_and_search(col, row, vertical, word, rest)
+
+        # The word may not be part of the best layout at all - try without it:
+        if placed + len(rest) > len(self.best_placements):
+            self._search(rest)
+
+    def _legal_coords(self, word):
+        """
+        The distinct legal placements of a word crossing the words on the grid, best score first
+        """
+        coords = []
+        seen = set()
+        for coord in self.crossword.suggest_coord(word):
+            key = (coord[0], coord[1], coord[2])
+            if key not in seen:
+                seen.add(key)
+                coords.append(key)
+        return coords
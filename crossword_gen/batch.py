@@ -0,0 +1,176 @@
+"""
+Generate many crossword PDFs in one run.
+
+The input is either a directory of word definition files (one puzzle per *.txt file, every row is {word} | {def}), or a
+JSON manifest with a list of puzzles:
+    [{"words": "week1.txt", "extra_words": "extra.txt", "size": 15, "hebrew": true, "seed": 3, "output": "week1.pdf"}]
+Only "words" is required, the rest default to the command line options. Relative paths are relative to the manifest.
+
+Run from the repository root:
+    python -m crossword_gen.batch -i words_dir -o pdf_dir -n 15 -w 8
+Or put all the puzzles in one PDF:
+    python -m crossword_gen.batch -i words_dir -p packet.pdf -n 15 -w 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from crossword_gen.crossword_gen import Crossword, read_word_and_defs, ENGINE_GREEDY, ENGINE_BACKTRACK
+from crossword_gen.cw_to_pdf import create_crossword_pdf, create_crossword_packet, RENDER_CANVAS
+
+HEB_LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+HEB_HEADINGS = ("אופקי", "מאונך")  # The across and down headings of the definitions
+ENG_HEADINGS = ("Across", "Down")
+
+
+def find_jobs(input_path, output_dir, size=15, extra_words=None, hebrew=True, engine=ENGINE_GREEDY,
+              time_permitted=5.0, seed=None):
+    """
+    Build the list of puzzles to generate from a directory of word files or a JSON manifest
+    :param input_path: A directory with word definition files (*.txt), or a JSON manifest file
+    :param output_dir: The directory to write the PDFs to
+    :param size: The default grid size
+    :param extra_words: The default extra word definitions file (or None)
+    :param hebrew: The default for whether the words are hebrew
+    :param engine: The search engine (see Crossword)
+    :param time_permitted: The time in seconds to search for each puzzle
+    :param seed: If not None, puzzle i gets seed + i (unless the manifest sets its own seed)
+    :return: A list of job dicts, as taken by generate_puzzle
+    """
+    if os.path.isdir(input_path):
+        entries = [{"words": name} for name in sorted(os.listdir(input_path)) if name.lower().endswith('.txt')]
+        base_dir = input_path
+    else:
+        with open(input_path, 'r') as fp:
+            entries = json.load(fp)
+        base_dir = os.path.dirname(os.path.abspath(input_path))
+
+    def _path(name):
+        return name if (name is None) or os.path.isabs(name) else os.path.join(base_dir, name)
+
+    jobs = []
+    for i, entry in enumerate(entries):
+        words_file = _path(entry["words"])
+        output = entry.get("output", os.path.splitext(os.path.basename(words_file))[0] + '.pdf')
+        jobs.append({
+            "words": words_file,
+            "extra_words": _path(entry["extra_words"]) if "extra_words" in entry else extra_words,
+            "size": entry.get("size", size),
+            "hebrew": entry.get("hebrew", hebrew),
+            "engine": entry.get("engine", engine),
+            "time_permitted": entry.get("time_permitted", time_permitted),
+            "seed": entry.get("seed", None if seed is None else seed + i),
+            "output": output if os.path.isabs(output) else os.path.join(output_dir, output),
+        })
+    return jobs
+
+
+def compute_puzzle(job):
+    """
+    Generate one crossword
+    :param job: A job dict (see find_jobs)
+    :return: A dict with the words file, the output file, the number of words placed, the number of words in the list
+        and the "pdf_args" of the puzzle: (empty_df, across, down, solved_df) as taken by create_crossword_pdf
+    """
+    word_list = read_word_and_defs(job["words"], hebrew=job["hebrew"])
+    extra_word_list = read_word_and_defs(job["extra_words"], hebrew=job["hebrew"]) if job["extra_words"] else []
+
+    crossword = Crossword(job["size"], job["size"], '*', 5000, word_list, extra_words=extra_word_list,
+                          letters=HEB_LETTERS if job["hebrew"] else None, rtl=job["hebrew"], engine=job["engine"],
+                          seed=job["seed"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        crossword.compute_crossword(time_permitted=job["time_permitted"], spins=2)
+
+    empty_df, solved_df = crossword.display()
+    across_defs, down_defs = crossword.legend()
+    across_heading, down_heading = HEB_HEADINGS if job["hebrew"] else ENG_HEADINGS
+    return {"words": job["words"], "output": job["output"], "words_placed": len(crossword.current_word_list),
+            "words_in_list": len(word_list),
+            "pdf_args": (empty_df, [across_heading] + across_defs, [down_heading] + down_defs, solved_df)}
+
+
+def generate_puzzle(job):
+    """
+    Generate one crossword and write its PDF (with the solution page)
+    :param job: A job dict (see find_jobs)
+    :return: A dict with the output file, the number of words placed and the number of words in the list
+    """
+    res = compute_puzzle(job)
+    empty_df, across, down, solved_df = res.pop("pdf_args")
+    create_crossword_pdf(empty_df, across, down, job["output"], solved_df=solved_df, renderer=RENDER_CANVAS)
+    return res
+
+
+def generate_packet(jobs, output_filename, workers=None):
+    """
+    Generate the puzzles in a pool of worker processes, and write them all to one PDF in the order of the jobs
+    :param jobs: A list of job dicts (see find_jobs). Their "output" is not used
+    :param output_filename: The name of the PDF to save, or a binary stream to write it to
+    :param workers: The number of processes (None for one per CPU)
+    :return: A generator of the result dicts (as generate_batch), in the order the puzzles finish. The PDF is written
+        after the last one
+    """
+    puzzles = [None] * len(jobs)
+    for res in generate_batch(jobs, workers, worker_func=compute_puzzle):
+        puzzles[res["index"]] = res.pop("pdf_args", None)
+        yield res
+    puzzles = [puzzle for puzzle in puzzles if puzzle is not None]  # Without the failed ones
+    create_crossword_packet(puzzles, output_filename, renderer=RENDER_CANVAS)
+
+
+def generate_batch(jobs, workers=None, worker_func=generate_puzzle):
+    """
+    Generate the puzzles in a pool of worker processes
+    :param jobs: A list of job dicts (see find_jobs)
+    :param workers: The number of processes (None for one per CPU)
+    :param worker_func: The function to run for each job - generate_puzzle writes a PDF per puzzle, compute_puzzle
+        returns the puzzle to the caller
+    :return: A generator of the result dicts of worker_func, in the order the puzzles finish, with the "index" of the
+        job in jobs added. A failed puzzle yields {"words": ..., "output": ..., "index": ..., "error": message}
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(worker_func, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures.pop(future)  # Don't keep finished jobs around
+            try:
+                res = future.result()
+            except Exception as e:
+                res = {"words": jobs[i]["words"], "output": jobs[i]["output"], "error": str(e)}
+            res["index"] = i
+            yield res
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--input", type=str, required=True,
+                        help="Directory with word definition files, or a JSON manifest")
+    parser.add_argument("-o", "--output_dir", type=str, default=".", help="Directory for the PDF files")
+    parser.add_argument("-p", "--packet", type=str, default=None,
+                        help="Write all the puzzles to this one PDF file instead of a file for each")
+    parser.add_argument("-n", "--size", type=int, default=15, help="Grid size (n x n)")
+    parser.add_argument("-x", "--extra_words", type=str, default=None, help="Extra word definitions file")
+    parser.add_argument("--english", action="store_true", help="The words are not hebrew")
+    parser.add_argument("-e", "--engine", choices=[ENGINE_GREEDY, ENGINE_BACKTRACK], default=ENGINE_GREEDY)
+    parser.add_argument("-t", "--time", type=float, default=5.0, help="Time in seconds for each puzzle")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = find_jobs(args.input, args.output_dir, args.size, args.extra_words, not args.english, args.engine,
+                     args.time, args.seed)
+    if args.packet:
+        results = generate_packet(jobs, args.packet, args.workers)
+    else:
+        results = generate_batch(jobs, args.workers)
+    for n, res in enumerate(results, 1):
+        if "error" in res:
+            print(f"[{n}/{len(jobs)}] {res['words']}: failed - {res['error']}")
+        else:
+            name = res['words'] if args.packet else res['output']
+            print(f"[{n}/{len(jobs)}] {name}: used {res['words_placed']} of {res['words_in_list']} words")
+    if args.packet:
+        print(f"Wrote {args.packet}")
@@ -0,0 +1,107 @@
+"""
+Benchmark the crossword generator on fixed word lists, to compare versions and catch regressions.
+
+Run from the repository root:
+    python -m crossword_gen.benchmark --time 2 --seed 1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from crossword_gen.crossword_gen import Crossword, read_word_and_defs, ENGINE_GREEDY, ENGINE_BACKTRACK
+
+HEB_LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+
+# (language, number of words, grid size):
+BENCHMARK_CASES = [
+    ('heb', 10, 10),
+    ('heb', 20, 15),
+    ('heb', 40, 20),
+    ('heb', 60, 25),
+    ('eng', 10, 10),
+    ('eng', 20, 15),
+    ('eng', 40, 20),
+    ('eng', 60, 25),
+]
+
+
+def _module_file(name):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+
+def load_words(language):
+    """
+    Load the fixed word list of a language
+    :param language: 'heb' or 'eng'
+    :return: A list of (word, clue) tuples
+    """
+    if language == 'heb':
+        return (read_word_and_defs(_module_file('heb_defs.txt')) +
+                read_word_and_defs(_module_file('extra_heb_defs.txt')))
+    elif language == 'eng':
+        return read_word_and_defs(_module_file('eng_defs.txt'), hebrew=False)
+    raise ValueError(f"Unknown language {language}")
+
+
+def run_case(language, n_words, size, engine=ENGINE_GREEDY, time_permitted=2.0, seed=1, max_iterations=None):
+    """
+    Generate one crossword with the first n_words of the language's word list
+    :return: A dict with the case, layouts (or search nodes) per second, the words placed and the compactness score
+    """
+    words = load_words(language)[:n_words]
+    crossword = Crossword(size, size, '*', 5000, words, letters=HEB_LETTERS if language == 'heb' else None,
+                          rtl=language == 'heb', engine=engine, seed=seed)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crossword.compute_crossword(time_permitted=time_permitted, spins=2, max_iterations=max_iterations)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'language': language,
+        'words': len(words),
+        'size': size,
+        'engine': engine,
+        'seconds': round(elapsed, 3),
+        'iterations': crossword.iterations,
+        'layouts_per_second': round(crossword.iterations / elapsed, 1),
+        'words_placed': len(crossword.current_word_list),
+        'score': round(crossword.score, 2),
+    }
+
+
+def run_benchmark(engines=(ENGINE_GREEDY, ENGINE_BACKTRACK), time_permitted=2.0, seed=1, max_iterations=None):
+    """
+    Run all the benchmark cases with each engine
+    :return: A list of result dicts (see run_case)
+    """
+    results = []
+    for engine in engines:
+        for language, n_words, size in BENCHMARK_CASES:
+            res = run_case(language, n_words, size, engine, time_permitted, seed, max_iterations)
+            print(f"{res['engine']:>9} {res['language']} {res['words']:>3} words {res['size']:>2}x{res['size']:<2} | "
+                  f"{res['layouts_per_second']:>9.1f} layouts/s | placed {res['words_placed']:>3}/{res['words']:<3} | "
+                  f"score {res['score']:.2f}")
+            results.append(res)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-t", "--time", type=float, default=2.0, help="Time in seconds for each crossword")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("-i", "--iterations", type=int, default=None,
+                        help="Stop after this many layouts / search nodes instead of after --time")
+    parser.add_argument("-e", "--engine", choices=[ENGINE_GREEDY, ENGINE_BACKTRACK], default=None,
+                        help="Run only this engine")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="Save the results to this JSON file")
+    args = parser.parse_args()
+
+    engines = (args.engine,) if args.engine else (ENGINE_GREEDY, ENGINE_BACKTRACK)
+    results = run_benchmark(engines, args.time, args.seed, args.iterations)
+    if args.output_file:
+        with open(args.output_file, 'w') as fp:
+            json.dump(results, fp, indent=2)
@@ -1,25 +1,40 @@
 # Taken from here: https://github.com/jeremy886/crossword_helmig/blob/master/crossword_puzzle.py
-import random, re, time, string
-from collections import defaultdict
+import random, re, time, string, heapq
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from copy import copy as duplicate
 import pandas as pd
-from crossword_gen.word import Word
+from crossword_gen.word import Word, Placement
+from crossword_gen.grid import LetterGrid
+from crossword_gen.slots import SlotIndex
+from crossword_gen.backtrack import BacktrackSearch
+
+# The search engines of compute_crossword:
+ENGINE_GREEDY = 'greedy'  # Place words greedily, restart from scratch and keep the best layout
+ENGINE_BACKTRACK = 'backtrack'  # Backtracking search (see BacktrackSearch)
 
 class Crossword(object):
     def __init__(self, cols, rows, empty='-', maxloops=2000, available_words=None, extra_words=None, letters=None,
-                 rtl=False):
+                 rtl=False, engine=ENGINE_GREEDY, seed=None):
         self.cols = cols
         self.rows = rows
         self.empty = empty
         self.maxloops = maxloops
+        self.seed = seed
+        self.random = random.Random(seed)  # All the randomness of the search comes from here, so a seed reproduces it
         self.available_words = self._gen_word_list(available_words) if available_words is not None else []
         self.extra_words = self._gen_word_list(extra_words) if extra_words is not None else []
         self.randomize_word_list()
         self.rtl = rtl  # Is this right to left? (e.g. hebrew)
-        self.grid_index = None
-        self.fit_score_cache = {}
-
-        self.current_word_list = []
+        if engine not in (ENGINE_GREEDY, ENGINE_BACKTRACK):
+            raise ValueError(f"Unknown engine {engine}")
+        self.engine = engine
+
+        self.current_word_list = []  # The Placements of the words on the grid
+        self.placed_words = {}  # Word -> its Placement in current_word_list
+        self.score = None  # The compactness score of the grid found by compute_crossword
+        self.score_count = 0  # The number of grids scored by _score_grid, and the time that took
+        self.score_time = 0.0
+        self.iterations = 0  # The number of layouts (greedy) or search nodes (backtrack) tried by compute_crossword
         self.debug = 0
 
         if letters is None:
@@ -33,15 +48,16 @@ class Crossword(object):
         temp_list = []
         for word in words_in:
             if isinstance(word, Word):
-                temp_list.append(Word(word.word, word.clue))
+                temp_list.append(Word(word.word, word.clue, rng=self.random))
             else:
-                temp_list.append(Word(word[0], word[1]))
+                temp_list.append(Word(word[0], word[1], rng=self.random))
         return temp_list
 
-    def clear_grid(self):  # initialize grid and fill with empty character
-        self.grid = [[self.empty for j in range(self.cols)] for i in range(self.rows)]
-        self.grid_index = defaultdict(list)
-        self.fit_score_cache = {}
+    def clear_grid(self):  # initialize grid and fill with empty character, and remove all words
+        self.grid = LetterGrid(self.cols, self.rows, self.empty)
+        self.current_word_list = []
+        self.placed_words = {}
+        self.slot_index = SlotIndex(self.cols, self.rows)
 
     def _randomize_word_list_ord(self, words_list):
         if words_list:
@@ -52,128 +68,287 @@ class Crossword(object):
         self._randomize_word_list_ord(self.available_words)
         self._randomize_word_list_ord(self.extra_words)
 
-    def reset_words(self):
-        """
-        Reset the words in self.current_wordlist to remove any location or numbering:
-        :return:
-        """
-        for word in self.current_word_list:
-            word.reset()
-
     def _score_grid(self, grid):
         """
-        Score the grid - convert to a dataframe, delete empty rows / cols, score ration of white to black cells:
-        :param grid: A list of lists (2D list) with the grid
+        Score the grid - the ratio of all cells to black cells in the bounding box of the words (all black rows and
+        columns around the words are not counted):
+        :param grid: The LetterGrid to score
         :return:
         """
-        new_grid = pd.DataFrame(grid)
-        # Columns removal:
-        cols_to_remove = []
-        for col in range(new_grid.shape[1]):
-            if (new_grid.iloc[:, col] == self.empty).all():
-                cols_to_remove.append(col)
-        if cols_to_remove:
-            new_grid = new_grid.drop(columns=cols_to_remove)
-
-        # Now the rows:
-        rows_to_remove = []
-        for row in range(new_grid.shape[0]):
-            if (new_grid.iloc[row, :] == self.empty).all():
-                rows_to_remove.append(row)
-        if rows_to_remove:
-            new_grid = new_grid.drop(index=rows_to_remove)
-
-        black_cells = (new_grid==self.empty).sum().sum()
-        white_cells = new_grid.shape[0] * new_grid.shape[1]
-        res = 100*white_cells / black_cells
+        start = time.perf_counter()
+        box_cells, letter_cells = grid.bounding_box_counts()
+        black_cells = max(box_cells - letter_cells, 1)
+        res = 100*box_cells / black_cells
+        self.score_count += 1
+        self.score_time += time.perf_counter() - start
         return res
 
-    def compute_crossword(self, time_permitted=5.00, spins=3):
+    def compute_crossword(self, time_permitted=5.00, spins=3, workers=1, max_iterations=None, cache=None,
+                          refine=False, on_improve=None, patience=None):
         """
         Try to create crosswords, and choose the best one we have
         :param time_permitted: The time in seconds we allow this to run
         :param spins: The number of times we try to add words in each cycle
+        :param workers: The number of processes to search in. With more than one, each process runs its own randomized
+            search for time_permitted seconds and the best result of all of them is kept
+        :param max_iterations: If not None, stop after this many layouts (greedy) or search nodes (backtrack) instead of
+            after time_permitted. Together with a seed this makes the result reproducible
+        :param cache: A LayoutCache (or None). If the layout is in the cache it is used without searching, and a newly
+            found layout is stored in it
+        :param refine: If True, a cached layout is only the starting point - search anyway and keep the better layout
+        :param on_improve: A function called with this crossword every time a better layout is found (anytime search),
+            e.g. to show a preview. With workers > 1 it is called as workers finish
+        :param patience: If not None, stop early once all the required words are placed and the score hasn't improved
+            for this many layouts (greedy engine). The backtracking engine always stops once all words are placed
         :return:
         """
+        if cache is not None:
+            search = self.search_params(time_permitted, spins, workers, max_iterations, patience)
+            cached = cache.get(self, search)
+            if cached is not None:
+                self.set_placements(cached[0])
+                self.score = cached[1]
+                if on_improve is not None:
+                    on_improve(self)
+                if not refine:
+                    return
+            self._compute_crossword(time_permitted, spins, workers, max_iterations, on_improve, patience)
+            cache.put(self, search)
+        else:
+            self._compute_crossword(time_permitted, spins, workers, max_iterations, on_improve, patience)
+
+    @staticmethod
+    def search_params(time_permitted, spins, workers, max_iterations, patience):
+        """
+        The parameters of compute_crossword that change the layout it finds, as a dict for the LayoutCache key. The
+        time is left out when max_iterations is set, as the search doesn't depend on it then
+        """
+        return {
+            "time_permitted": None if max_iterations is not None else float(time_permitted),
+            "spins": spins,
+            "workers": workers,
+            "max_iterations": max_iterations,
+            "patience": patience,
+        }
+
+    def _compute_crossword(self, time_permitted, spins, workers, max_iterations, on_improve=None, patience=None):
+        # Keep the layout we already have if the search doesn't beat it:
+        previous = (self.get_placements(), self.score) if self.current_word_list else None
+
         time_permitted = float(time_permitted)
+        if workers > 1:
+            self._compute_crossword_parallel(time_permitted, spins, workers, max_iterations, on_improve, patience)
+        elif self.engine == ENGINE_BACKTRACK:
+            self._compute_crossword_backtrack(time_permitted, max_iterations, on_improve)
+        else:
+            self._compute_crossword_greedy(time_permitted, spins, max_iterations, on_improve, patience)
+
+        if previous is not None and (len(previous[0]), previous[1]) > (len(self.current_word_list), self.score):
+            self.set_placements(previous[0])
+            self.score = previous[1]
 
+    def _compute_crossword_greedy(self, time_permitted, spins, max_iterations=None, on_improve=None, patience=None):
+        """
+        Place the words greedily in a fresh grid again and again, and keep the best layout
+        """
         count = 0
         best_score = -1
+        all_placed = False  # Are all the required words in the best layout?
+        not_improved = 0  # The number of layouts since the best one
         copy = Crossword(self.cols, self.rows, self.empty, self.maxloops, self.available_words, self.extra_words,
-                         self.letters, self.rtl)
+                         self.letters, self.rtl, seed=self.random.randrange(2 ** 32))
 
         start_full = float(time.time())
-        while (float(time.time()) - start_full) < time_permitted or count == 0:  # only run for x seconds
+        while self._keep_searching(count, start_full, time_permitted, max_iterations):
             self.debug += 1
-            copy.current_word_list = []
             copy.clear_grid()
             copy.randomize_word_list()
-            copy.reset_words()
             x = 0
             while x < spins:  # spins; 2 seems to be plenty
                 for word in copy.available_words:
-                    if word not in copy.current_word_list:
+                    if word not in copy.placed_words:
                         copy.fit_and_add(word)
                 x += 1
 
             # Now try to add some extra words:
-            extra_added = 0
-            for word in copy.extra_words:
-                if word not in copy.current_word_list:
-                    if(copy.fit_and_add(word)):
-                        extra_added += 1
-                if extra_added > 3:
-                    break
+            copy.fit_extra_words()
 
             # buffer the best crossword by comparing placed words
             if len(copy.current_word_list) >= len(self.current_word_list):
                 # Score how compact the result is - ratio of white cells to black cells:
                 score = self._score_grid(copy.grid)
                 if score > best_score:
-                    self.current_word_list = [w.copy() for w in copy.current_word_list]
+                    # Placements are immutable, so copying the lists saves the layout:
+                    self.current_word_list = list(copy.current_word_list)
+                    self.placed_words = dict(copy.placed_words)
                     self.grid = copy.grid
                     best_score = score
+                    all_placed = all(w in copy.placed_words for w in copy.available_words)
+                    not_improved = -1
+                    if on_improve is not None:
+                        self.score = best_score
+                        on_improve(self)
             count += 1
-        print(f"Calculated {count} copies in the process")
+            not_improved += 1
+            if all_placed and patience is not None and not_improved >= patience:
+                break  # Good enough - stop early
+        self.score = best_score
+        self.iterations = count
+        # We took the grid of the copy - index it for this crossword:
+        self._index_grid_letters()
+        print(f"Calculated {count} copies in the process, scored {self.score_count} in {self.score_time:.3f}s")
         return
 
-    def _index_grid_letters(self):
+    @staticmethod
+    def _keep_searching(count, start, time_permitted, max_iterations):
+        if count == 0:
+            return True
+        if max_iterations is not None:
+            return count < max_iterations
+        return (float(time.time()) - start) < time_permitted  # only run for x seconds
+
+    def _compute_crossword_backtrack(self, time_permitted, max_iterations=None, on_improve=None):
         """
-        Builds an index from letter to all locations in the grid containing that letter. Used to speed up the calculation
-        of suggested coords. Saves the index in self.grid_index
-        :return: None
+        Find the layout of the required words with a backtracking search, then add extra words to it
+        """
+        copy = Crossword(self.cols, self.rows, self.empty, self.maxloops, self.available_words, self.extra_words,
+                         self.letters, self.rtl, seed=self.random.randrange(2 ** 32))
+
+        def _on_best(best_placements):
+            # Show the required words found so far (extra words are only added at the end):
+            self.set_placements(best_placements)
+            self.score = self._score_grid(self.grid)
+            on_improve(self)
+
+        search = BacktrackSearch(copy, time_permitted, max_nodes=max_iterations,
+                                 on_best=_on_best if on_improve is not None else None)
+        placements = search.run()
+        self.iterations = search.nodes
+
+        self.set_placements(placements)
+        self.fit_extra_words()
+        self.score = self._score_grid(self.grid)
+        if on_improve is not None:
+            on_improve(self)
+        print(f"Searched {search.nodes} nodes in the process")
+
+    def fit_extra_words(self, max_extra=4):
+        """
+        Try to add some of the extra words to the grid
+        :param max_extra: The maximal number of extra words to add
+        :return: The number of extra words added
         """
-        self.grid_index = defaultdict(list)
-        for rowc, row in enumerate(self.grid):
-            for colc, letter in enumerate(row):
-                if letter != self.empty:
-                    self.grid_index[letter].append((rowc+1, colc+1))
+        extra_added = 0
+        for word in self.extra_words:
+            if extra_added >= max_extra:
+                break
+            if word not in self.placed_words:
+                if self.fit_and_add(word):
+                    extra_added += 1
+        return extra_added
+
+    def _compute_crossword_parallel(self, time_permitted, spins, workers, max_iterations=None, on_improve=None,
+                                    patience=None):
+        """
+        Run compute_crossword in a pool of worker processes, each with its own random seed. Every worker sends back only
+        the placements of its best grid and its score, and we keep the one with the most words (then the best score)
+        """
+        crossword_args = (self.cols, self.rows, self.empty, self.maxloops,
+                          [(w.word, w.clue) for w in self.available_words],
+                          [(w.word, w.clue) for w in self.extra_words],
+                          self.letters, self.rtl, self.engine)
+        seeds = [self.random.randrange(2 ** 32) for _ in range(workers)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_search_worker, crossword_args, time_permitted, spins, seed, max_iterations,
+                                       patience)
+                       for seed in seeds]
+            best = None
+            for future in as_completed(futures):
+                res = future.result()
+                if on_improve is not None and (best is None or (len(res[0]), res[1]) > (len(best[0]), best[1])):
+                    best = res
+                    self.set_placements(res[0])
+                    self.score = res[1]
+                    on_improve(self)
+            results = [future.result() for future in futures]
+
+        placements, score, _ = max(results, key=lambda res: (len(res[0]), res[1]))
+        self.set_placements(placements)
+        self.score = score
+        self.iterations = sum(res[2] for res in results)
+
+    def get_placements(self):
+        """
+        Return the words placed on the grid in a compact form
+        :return: A list of (word, clue, col, row, vertical) tuples
+        """
+        return [(p.word.word, p.word.clue, p.col, p.row, p.vertical) for p in self.current_word_list]
 
-    def suggest_coord(self, word):
+    def set_placements(self, placements):
         """
-        Suggest locations for a word. Looks for one letter matches to suggest with existing words on the grid
-        :param word:
+        Clear the grid and place the words in it
+        :param placements: A list of (word, clue, col, row, vertical) tuples, as returned by get_placements
         :return:
         """
-        if self.grid_index is None:
-            self._index_grid_letters()
-        coordlist = []
-        for glc, given_letter in enumerate(word.word):  # cycle through letters in word
-            for rowc, colc in self.grid_index[given_letter]:
-                if rowc - glc > 0:  # make sure we're not suggesting a starting point off the grid
-                    if ((rowc - glc) + word.length) <= self.rows:  # make sure word doesn't go off of grid
-                        coordlist.append([colc, rowc - glc, 1, colc + (rowc - glc), 0])
-                if colc - glc > 0:  # make sure we're not suggesting a starting point off the grid
-                    if ((colc - glc) + word.length) <= self.cols:  # make sure word doesn't go off of grid
-                        coordlist.append([colc - glc, rowc, 0, rowc + (colc - glc), 0])
+        self.clear_grid()
+        for word, clue, col, row, vertical in placements:
+            self.set_word(col, row, vertical, Word(word, clue, rng=self.random))
 
+    def _index_grid_letters(self):
+        """
+        Builds the index of the open slots of the letters on the grid (self.slot_index), where other words can cross
+        them. Used to speed up the calculation of suggested coords
+        :return: None
+        """
+        self.slot_index = SlotIndex(self.cols, self.rows)
+        for letter, colc, rowc in self.grid.letter_cells():
+            self._index_slots(letter, colc, rowc)
 
-                    # example: coordlist[0] = [col, row, vertical, col + row, score]
+    def _index_slots(self, letter, col, row):
+        """
+        Open or close the slots of a letter on the grid, by the cells next to it
+        """
+        # A letter can be crossed down if it isn't part of a down word already, and across likewise:
+        if self.check_if_cell_clear(col, row - 1) and self.check_if_cell_clear(col, row + 1):
+            self.slot_index.open(letter, col, row, 1)
+        else:
+            self.slot_index.close(letter, col, row, 1)
+        if self.check_if_cell_clear(col - 1, row) and self.check_if_cell_clear(col + 1, row):
+            self.slot_index.open(letter, col, row, 0)
+        else:
+            self.slot_index.close(letter, col, row, 0)
 
+    def suggest_coord(self, word):
+        """
+        Suggest locations for a word. Looks for one letter matches with the open slots of the words on the grid
+        :param word:
+        :return: A list of [col, row, vertical, col + row, score], best score first. Only legal placements are returned
+        """
+        coordlist = [[col, row, vertical, col + row, 0] for col, row, vertical in self.slot_index.placements(word)]
         new_coordlist = self.sort_coordlist(coordlist, word)
 
         return new_coordlist
 
+    def iter_placements(self, word):
+        """
+        Like suggest_coord, as a generator: every placement is scored up front, and the legal ones are kept in a heap
+        and popped one by one, best score first (in random order between equal scores). Only the ordering is lazy -
+        heapify instead of a full sort is what saves time when only the first few are used
+        :param word:
+        :return: A generator of (col, row, vertical, score)
+        """
+        heap = []
+        fit_score, codes, length, rand = self.grid.fit_score, word.codes, word.length, self.random.random
+        for col, row, vertical in self.slot_index.placements(word):
+            score = fit_score(col, row, vertical, codes, length)  # check_fit_score, without the call in between
+            if score:  # 0 scores are filtered
+                heap.append((-score, rand(), col, row, vertical))
+        heapq.heapify(heap)
+        while heap:
+            neg_score, _, col, row, vertical = heapq.heappop(heap)
+            yield col, row, vertical, -neg_score
+
     def sort_coordlist(self, coordlist, word):  # give each coordinate a score, then sort
         new_coordlist = []
         for coord in coordlist:
@@ -181,48 +356,43 @@ class Crossword(object):
             coord[4] = self.check_fit_score(col, row, vertical, word)  # checking scores
             if coord[4]:  # 0 scores are filtered
                 new_coordlist.append(coord)
-        random.shuffle(new_coordlist)  # randomize coord list; why not?
+        self.random.shuffle(new_coordlist)  # randomize coord list; why not?
         new_coordlist.sort(key=lambda i: i[4], reverse=True)  # put the best scores first
         return new_coordlist
 
     def fit_and_add(self, word):
         # doesn't really check fit except for the first word; otherwise just adds if score is good
+        if self.current_word_list:
+            # subsequent words take the best legal placement, if there is one:
+            for col, row, vertical, _ in self.iter_placements(word):
+                self.set_word(col, row, vertical, word)
+                return True
+            return False  # no more cordinates, stop trying to fit
+
+        # this is the first word: the seed
         fit = False
         count = 0
-        coordlist = self.suggest_coord(word)
-
         while not fit and count < self.maxloops:
+            # top left seed of longest word yields best results (maybe override)
+            vertical = self.random.randrange(0, 2)
+            col = self.random.randrange(1, self.cols-len(word))
+            row = self.random.randrange(1, self.rows-len(word))
+            ''' 
+            # optional center seed method, slower and less keyword placement
+            if vertical:
+                col = int(round((self.cols + 1)/2, 0))
+                row = int(round((self.rows + 1)/2, 0)) - int(round((word.length + 1)/2, 0))
+            else:
+                col = int(round((self.cols + 1)/2, 0)) - int(round((word.length + 1)/2, 0))
+                row = int(round((self.rows + 1)/2, 0))
+            # completely random seed method
+            col = random.randrange(1, self.cols + 1)
+            row = random.randrange(1, self.rows + 1)
+            '''
 
-            if len(self.current_word_list) == 0:  # this is the first word: the seed
-                # top left seed of longest word yields best results (maybe override)
-                vertical = random.randrange(0, 2)
-                col = random.randrange(1, self.cols-len(word))
-                row = random.randrange(1, self.rows-len(word))
-                ''' 
-                # optional center seed method, slower and less keyword placement
-                if vertical:
-                    col = int(round((self.cols + 1)/2, 0))
-                    row = int(round((self.rows + 1)/2, 0)) - int(round((word.length + 1)/2, 0))
-                else:
-                    col = int(round((self.cols + 1)/2, 0)) - int(round((word.length + 1)/2, 0))
-                    row = int(round((self.rows + 1)/2, 0))
-                # completely random seed method
-                col = random.randrange(1, self.cols + 1)
-                row = random.randrange(1, self.rows + 1)
-                '''
-
-                if self.check_fit_score(col, row, vertical, word):
-                    fit = True
-                    self.set_word(col, row, vertical, word)
-            else:  # a subsquent words have scores calculated
-                try:
-                    col, row, vertical = coordlist[count][0], coordlist[count][1], coordlist[count][2]
-                except IndexError:
-                    return  # no more cordinates, stop trying to fit
-
-                if coordlist[count][4]:  # already filtered these out, but double check
-                    fit = True
-                    self.set_word(col, row, vertical, word)
+            if self.check_fit_score(col, row, vertical, word):
+                fit = True
+                self.set_word(col, row, vertical, word)
 
             count += 1
         return fit
@@ -231,118 +401,73 @@ class Crossword(object):
         '''
         And return score (0 signifies no fit). 1 means a fit, 2+ means a cross.
 
-        The more crosses the better.
+        The more crosses the better. The check takes a few int operations on the packed grid lines (see
+        LetterGrid.fit_score), which is cheaper than caching the scores and invalidating them as words are set.
         '''
-        the_hash = hash((col, row, vertical, word))
-        if the_hash not in self.fit_score_cache:
-            self.fit_score_cache[the_hash] = self._check_fit_score(col, row, vertical, word)
-        return self.fit_score_cache[the_hash]
+        return self.grid.fit_score(col, row, vertical, word.codes, word.length)
 
-    def _check_fit_score(self, col, row, vertical, word):
-        '''
-        And return score (0 signifies no fit). 1 means a fit, 2+ means a cross.
-
-        The more crosses the better.
-        '''
-        if col < 1 or row < 1:
-            return 0
-
-        count, score = 1, 1  # give score a standard value of 1, will override with 0 if collisions detected
-        for letter in word.word:
-            try:
-                active_cell = self.get_cell(col, row)
-            except IndexError:
-                return 0
-
-            if active_cell == self.empty or active_cell == letter:
-                pass
+    def set_word(self, col, row, vertical, word):  # also adds word to word list
+        placement = Placement(word, col, row, vertical, None)
+        self.current_word_list.append(placement)
+        self.placed_words[word] = placement
+
+        written = self.grid.write_word(col, row, vertical, word.word, word.codes)
+        for letter, new in zip(word.word, written):
+            if new:  # Crossing cells are already set and in the index
+                self.slot_index.open(letter, col, row, not vertical)  # Other words may cross this letter
             else:
-                return 0
-
-            if active_cell == letter:
-                score += 1
-
+                self.slot_index.close(letter, col, row, vertical)  # This letter is crossed now
             if vertical:
-                # check surroundings
-                if active_cell != letter:  # don't check surroundings if cross point
-                    if not self.check_if_cell_clear(col + 1, row):  # check right cell
-                        return 0
-
-                    if not self.check_if_cell_clear(col - 1, row):  # check left cell
-                        return 0
-
-                if count == 1:  # check top cell only on first letter
-                    if not self.check_if_cell_clear(col, row - 1):
-                        return 0
-
-                if count == len(word.word):  # check bottom cell only on last letter
-                    if not self.check_if_cell_clear(col, row + 1):
-                        return 0
-            else:  # else horizontal
-                # check surroundings
-                if active_cell != letter:  # don't check surroundings if cross point
-                    if not self.check_if_cell_clear(col, row - 1):  # check top cell
-                        return 0
-
-                    if not self.check_if_cell_clear(col, row + 1):  # check bottom cell
-                        return 0
-
-                if count == 1:  # check left cell only on first letter
-                    if not self.check_if_cell_clear(col - 1, row):
-                        return 0
-
-                if count == len(word.word):  # check right cell only on last letter
-                    if not self.check_if_cell_clear(col + 1, row):
-                        return 0
-
-            if vertical:  # progress to next letter and position
                 row += 1
-            else:  # else horizontal
+            else:
                 col += 1
 
-            count += 1
-
-        return score
-
-    def set_word(self, col, row, vertical, word):  # also adds word to word list
-        word.col = col
-        word.row = row
-        word.vertical = vertical
-        self.current_word_list.append(word)
-
-        for letter in word.word:
-            self.set_cell(col, row, letter)
+    def unset_word(self, word):  # also removes word from word list
+        """
+        Remove a word set with set_word. Letters shared with a crossing word stay on the grid. The grid counts the words
+        through each cell, so the words can be removed in any order, not just the last placed first
+        :param word: The word to remove
+        :return:
+        """
+        placement = self.placed_words.pop(word)
+        self.current_word_list.remove(placement)
+
+        col, row, vertical = placement.col, placement.row, placement.vertical
+        erased = self.grid.erase_word(col, row, vertical, word.word)
+        neighbours = set()  # The cells next to removed letters - they may be open to crossing words now
+        for letter, gone in zip(word.word, erased):
+            if gone:
+                self.slot_index.close(letter, col, row, 0)
+                self.slot_index.close(letter, col, row, 1)
+                neighbours.update(((col - 1, row), (col + 1, row), (col, row - 1), (col, row + 1)))
+            else:
+                neighbours.add((col, row))  # The crossing word can be crossed here again
             if vertical:
                 row += 1
             else:
                 col += 1
-
-        # Rebuild the letter to loc index and reset the fit score cache:
-        self._index_grid_letters()
-        self.fit_score_cache = {}
+        for col, row in neighbours:
+            if not self.check_if_cell_clear(col, row):
+                self._index_slots(self.get_cell(col, row), col, row)
 
     def set_cell(self, col, row, value):
-        self.grid[row - 1][col - 1] = value
+        self.grid.set_cell(col, row, value)
 
     def get_cell(self, col, row):
-        return self.grid[row - 1][col - 1]
+        return self.grid.get_cell(col, row)
 
     def check_if_cell_clear(self, col, row):
-        try:
-            cell = self.get_cell(col, row)
-            if cell == self.empty:
-                return True
-        except IndexError:
-            pass
-        return False
+        return self.grid.check_if_cell_clear(col, row)
 
     def order_number_words(self):  # orders words and applies numbering system to them
         self.current_word_list.sort(key=lambda i: (i.col + i.row*100))
         count, icount = 1, 1
-        for word in self.current_word_list:
-            word.number = count
+        for placement in self.current_word_list:
+            self.current_word_list[icount - 1] = placement = placement._replace(number=count)
+            self.placed_words[placement.word] = placement
             if icount < len(self.current_word_list):
-                if word.col == self.current_word_list[icount].col and word.row == self.current_word_list[icount].row:
+                if placement.col == self.current_word_list[icount].col and \
+                        placement.row == self.current_word_list[icount].row:
                     pass
                 else:
                     count += 1
@@ -360,17 +485,18 @@ class Crossword(object):
         """
         self.order_number_words()
 
-        new_grid_data = [[self.empty if l==self.empty else ' ' for l in row] for row in self.grid]
+        grid_data = self.grid.to_list()
+        new_grid_data = [[self.empty if l==self.empty else ' ' for l in row] for row in grid_data]
         # Replace all letters in the grid with the ' ' character:
 
-        for word in self.current_word_list:
-            new_grid_data[word.row - 1][word.col - 1] = word.number
+        for placement in self.current_word_list:
+            new_grid_data[placement.row - 1][placement.col - 1] = placement.number
         if self.rtl:
             new_grid = pd.DataFrame([row[::-1] for row in new_grid_data])
-            solved_grid = pd.DataFrame([row[::-1] for row in self.grid])
+            solved_grid = pd.DataFrame([row[::-1] for row in grid_data])
         else:
             new_grid = pd.DataFrame(new_grid_data)
-            solved_grid = pd.DataFrame(self.grid)
+            solved_grid = pd.DataFrame(grid_data)
 
         if prune:
             # Columns removal:
@@ -396,9 +522,9 @@ class Crossword(object):
     def word_bank(self):
         outStr = ''
         temp_list = duplicate(self.current_word_list)
-        random.shuffle(temp_list)  # randomize word list
-        for word in temp_list:
-            outStr += '%s\n' % word.word
+        self.random.shuffle(temp_list)  # randomize word list
+        for placement in temp_list:
+            outStr += '%s\n' % placement.word.word
         return outStr
 
     def legend(self):
@@ -409,13 +535,25 @@ class Crossword(object):
         down_defs = []
         across_defs = []
 
-        for word in self.current_word_list:
-            if word.vertical:
-                down_defs.append(f'{word.number}. {word.clue}')
+        for placement in self.current_word_list:
+            if placement.vertical:
+                down_defs.append(f'{placement.number}. {placement.word.clue}')
             else:
-                across_defs.append(f'{word.number}. {word.clue}')
+                across_defs.append(f'{placement.number}. {placement.word.clue}')
         return across_defs, down_defs
 
+def _search_worker(crossword_args, time_permitted, spins, seed, max_iterations=None, patience=None):
+    """
+    Run one crossword search in a worker process
+    :param crossword_args: The arguments to create the Crossword with
+    :param seed: The random seed for this worker
+    :return: (placements, score, iterations) of the best grid found
+    """
+    crossword = Crossword(*crossword_args, seed=seed)
+    crossword.compute_crossword(time_permitted=time_permitted, spins=spins, max_iterations=max_iterations,
+                                patience=patience)
+    return crossword.get_placements(), crossword.score, crossword.iterations
+
 def _remove_hebrew_end_chars(s):
     # Replace the end hebrew chars with the regular chars
     ends = 'םןףךץ'
@@ -1,35 +1,21 @@
-import os.path
 import string
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.lib import colors
-import pandas as pd
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 
-def _get_parent_dir():
-    # Get the path of the current module
-    current_module_path = __file__
+from fonts.registry import register_font, HEBREW_FONT
 
-    # Get the directory containing the current module
-    current_module_directory = os.path.dirname(current_module_path)
-
-    # Get the absolute path of the directory
-    absolute_directory = os.path.abspath(current_module_directory)
-
-    # Get the directory above the current module
-    folder_above = os.path.dirname(absolute_directory)
-
-    return folder_above
-
-pdfmetrics.registerFont(TTFont('Hebrew', os.path.join(_get_parent_dir(), 'fonts', 'arial-hebrew.ttf')))
+# How the grid is drawn in the PDF:
+RENDER_TABLE = 'table'  # A reportlab Table with a Paragraph in every cell
+RENDER_CANVAS = 'canvas'  # Drawn straight on the canvas (CrosswordGrid) - the same look, much faster and smaller
 
 heb_style = ParagraphStyle(
     name='CustomStyle',
-    fontName='Hebrew',
+    fontName=HEBREW_FONT,
     fontSize=14,
     alignment=TA_RIGHT,
     spaceAfter=0.2,
@@ -69,7 +55,7 @@ def _gen_crossword_table(df, is_solution=False):
     cell_height = 30
     cell_style = getSampleStyleSheet()['Normal']
     if is_solution:
-        cell_style.fontName = "Hebrew"
+        cell_style.fontName = HEBREW_FONT
         cell_style.fontSize = 14
         cell_style.alignment = TA_CENTER
     else:
@@ -103,6 +89,90 @@ def _gen_crossword_table(df, is_solution=False):
     crossword_table.setStyle(cw_tab_style)
     return crossword_table
 
+class CrosswordGrid(Flowable):
+    """
+    The crossword grid drawn straight on the canvas, looking the same as _gen_crossword_table. All the black cells are
+    filled as one path, all the grid lines are stroked as one path and all the numbers (or letters) are written in
+    one text object, instead of a Paragraph and a style command per cell.
+    """
+    cell_size = 30
+    # The cell padding of a Table, which sets where the text goes in the cell:
+    padding_side = 6
+    padding_top = 3
+
+    def __init__(self, df, is_solution=False):
+        """
+        :param df: The grid, as taken by _gen_crossword_table
+        :param is_solution: If True the cells hold letters, written larger and centered. Else the cells hold definition
+            numbers, written small in the top right corner
+        """
+        Flowable.__init__(self)
+        self.cells = df.values.tolist()
+        self.n_rows, self.n_cols = df.shape
+        self.is_solution = is_solution
+        self.hAlign = 'CENTER'
+        if is_solution:
+            self.font_name, self.font_size = HEBREW_FONT, 14
+        else:
+            self.font_name, self.font_size = 'Helvetica', 8
+
+    def wrap(self, avail_width, avail_height):
+        return self.n_cols * self.cell_size, self.n_rows * self.cell_size
+
+    def draw(self):
+        canv = self.canv
+        size = self.cell_size
+        width, height = self.n_cols * size, self.n_rows * size
+
+        black_cells = canv.beginPath()
+        text = canv.beginText()
+        text.setFont(self.font_name, self.font_size)
+        for i, row in enumerate(self.cells):
+            top = height - i * size
+            for k, cell in enumerate(row):
+                left = k * size
+                cell = str(cell).strip()
+                if cell == '*':
+                    black_cells.rect(left, top - size, size, size)
+                elif cell:
+                    cell_width = pdfmetrics.stringWidth(cell, self.font_name, self.font_size)
+                    if self.is_solution:
+                        x = left + (size - cell_width) / 2
+                    else:
+                        x = left + size - self.padding_side - cell_width
+                    text.setTextOrigin(x, top - self.padding_top - self.font_size)
+                    text.textOut(cell)
+
+        lines = canv.beginPath()
+        for i in range(self.n_rows + 1):
+            lines.moveTo(0, i * size)
+            lines.lineTo(width, i * size)
+        for k in range(self.n_cols + 1):
+            lines.moveTo(k * size, 0)
+            lines.lineTo(k * size, height)
+
+        canv.saveState()
+        canv.setFillColor(colors.gray)
+        canv.drawPath(black_cells, stroke=0, fill=1)
+        canv.setFillColor(colors.black)
+        canv.drawText(text)
+        canv.setStrokeColor(colors.black)
+        canv.setLineWidth(1)
+        canv.setLineCap(1)
+        canv.setLineJoin(1)
+        canv.drawPath(lines, stroke=1, fill=0)
+        canv.restoreState()
+
+def _gen_crossword_grid(df, is_solution=False, renderer=RENDER_TABLE):
+    """
+    Generate the flowable of the grid with the given renderer (RENDER_TABLE or RENDER_CANVAS)
+    """
+    if renderer == RENDER_TABLE:
+        return _gen_crossword_table(df, is_solution=is_solution)
+    elif renderer == RENDER_CANVAS:
+        return CrosswordGrid(df, is_solution=is_solution)
+    raise ValueError(f"Unknown renderer {renderer}")
+
 def _gen_definitions_legend(across, down):
     """
     Add a table with the across and down definitions side by side
@@ -125,26 +195,15 @@ def _gen_definitions_legend(across, down):
     table.setStyle(TableStyle([('VALIGN', (0,0), (-1,-1), "TOP")]))
     return table
 
-# Function to create a crossword puzzle PDF
-def create_crossword_pdf(df, across, down, output_filename, solved_df=None):
+def _gen_crossword_elements(df, across, down, solved_df=None, renderer=RENDER_TABLE):
     """
-    Crete a PDF with the crossword
-    :param df: The dataframe with the grid for the puzzle. Black cells should contain the '*' char. Empty should be empty. Numbers
-        (of across or down definition cells) should contain the number as string.
-    :param across: A list of across definitions. Each definition a string, e.g. "2. Definition for cells".
-        The first item in the 'across' list is the label to use for the across (e.g. across[0] = 'Across')
-    :param down: Like across, only for down
-    :param output_filename: The name of the PDF to save
-    :param solved_df: (optional) the solved dataframe. If not None, added as a second page
-    :return:
+    The flowables of one crossword: the grid, the definitions and (optionally) the solution on a new page. See
+    create_crossword_pdf for the parameters
+    :return: A list of flowables
     """
-    # Create a PDF document
-    doc = SimpleDocTemplate(output_filename, pagesize=A4)
-
-    # Create a list to hold the content for the PDF
     elements = []
 
-    crossword_table = _gen_crossword_table(df)
+    crossword_table = _gen_crossword_grid(df, renderer=renderer)
     elements.append(crossword_table)
     elements.append(Spacer(1, 20))  # Spacer for separation
 
@@ -155,13 +214,55 @@ def create_crossword_pdf(df, across, down, output_filename, solved_df=None):
     # If we have the solution grid, add it as well with a page break:
     if solved_df is not None:
         elements.append(PageBreak())
-        solution_table = _gen_crossword_table(solved_df, is_solution=True)
+        solution_table = _gen_crossword_grid(solved_df, is_solution=True, renderer=renderer)
         elements.append(solution_table)
+    return elements
+
+# Function to create a crossword puzzle PDF
+def create_crossword_pdf(df, across, down, output_filename, solved_df=None, renderer=RENDER_TABLE):
+    """
+    Crete a PDF with the crossword
+    :param df: The dataframe with the grid for the puzzle. Black cells should contain the '*' char. Empty should be empty. Numbers
+        (of across or down definition cells) should contain the number as string.
+    :param across: A list of across definitions. Each definition a string, e.g. "2. Definition for cells".
+        The first item in the 'across' list is the label to use for the across (e.g. across[0] = 'Across')
+    :param down: Like across, only for down
+    :param output_filename: The name of the PDF to save, or a binary stream to write it to (e.g. io.BytesIO)
+    :param solved_df: (optional) the solved dataframe. If not None, added as a second page
+    :param renderer: How to draw the grid - RENDER_TABLE, or RENDER_CANVAS which is faster and makes a smaller PDF
+    :return:
+    """
+    # Create a PDF document
+    register_font(HEBREW_FONT)
+    doc = SimpleDocTemplate(output_filename, pagesize=A4)
 
     # Build the PDF document
+    doc.build(_gen_crossword_elements(df, across, down, solved_df=solved_df, renderer=renderer))
+
+def create_crossword_packet(puzzles, output_filename, renderer=RENDER_TABLE):
+    """
+    Create one PDF with many crosswords, each starting on a new page (and followed by its solution page, if given).
+    The fonts are embedded in the document once for all the puzzles
+    :param puzzles: A list of (df, across, down, solved_df) tuples, as taken by create_crossword_pdf. solved_df may be
+        None
+    :param output_filename: The name of the PDF to save, or a binary stream to write it to (e.g. io.BytesIO)
+    :param renderer: How to draw the grids (see create_crossword_pdf)
+    :return:
+    """
+    register_font(HEBREW_FONT)
+    doc = SimpleDocTemplate(output_filename, pagesize=A4)
+
+    elements = []
+    for df, across, down, solved_df in puzzles:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(_gen_crossword_elements(df, across, down, solved_df=solved_df, renderer=renderer))
+
     doc.build(elements)
 
 if __name__ == '__main__':
+    import pandas as pd
+
     # Sample crossword data
     crossword_data = {
         'A': ['1', '*', ' ', '2'],
@@ -0,0 +1,248 @@
+from functools import lru_cache
+
+import numpy as np
+
+# The code of an empty cell. Letters are stored by their unicode code point, so any alphabet fits in an int32
+EMPTY_CODE = 0
+
+# Every line of the grid (row or column) is also kept as one Python int, with the code of each cell in a lane of
+# LANE_BITS bits - cell i of the line in bits [i * LANE_BITS, (i + 1) * LANE_BITS). The fit check then tests all the
+# letters of a word, and the cells on both sides of it, with a few int operations instead of a loop over the letters.
+# Code points are below 2 ** 21, so adding _LANE_LOW to a lane never carries into the next lane, and sets the lane's
+# high bit exactly when the lane isn't 0.
+LANE_BITS = 22
+_LANE = (1 << LANE_BITS) - 1
+_LANE_LOW = _LANE >> 1
+_LANE_HIGH = _LANE_LOW + 1
+
+
+def _repeat(lane, n):
+    # An int with n lanes, each holding lane
+    return sum(lane << (i * LANE_BITS) for i in range(n))
+
+
+@lru_cache(maxsize=None)
+def _lane_masks(size):
+    # Per word length up to size: the low bits and the high bit of every lane of the word, and the lanes of the cells
+    # before and after the word (with the line shifted so the cell before the word is lane 0)
+    return [(_repeat(_LANE_LOW, n), _repeat(_LANE_HIGH, n), _LANE | (_LANE << ((n + 1) * LANE_BITS)))
+            for n in range(size)]
+
+
+def letter_codes(s):
+    """
+    Convert a string to the codes used to store its letters in a LetterGrid
+    :param s: The string (e.g. a word)
+    :return: An int with the code of each letter in a lane of LANE_BITS bits, the first letter in the lowest lane
+    """
+    return sum(ord(l) << (i * LANE_BITS) for i, l in enumerate(s))
+
+
+class LetterGrid(object):
+    """
+    The crossword grid, stored as one flat numpy array of letter codes. The grid is surrounded by a sentinel border one
+    cell wide that always stays empty, so looking at the neighbours of any cell in the grid never falls off the array
+    and never needs a bounds check. The rows and columns are also kept packed in ints (see LANE_BITS) for fit_score.
+    Coordinates are 1-based like in Crossword: (col=1, row=1) is the top left cell of the grid, and col / row 0 and
+    cols+1 / rows+1 are the border.
+    """
+    def __init__(self, cols, rows, empty='-'):
+        self.cols = cols
+        self.rows = rows
+        self.empty = empty
+        self.stride = cols + 2  # The distance in the flat array between a cell and the one below it
+        self.cells = np.zeros((rows + 2) * self.stride, dtype=np.int32)
+        # Indexing single cells of a numpy array is slow (every access creates a numpy scalar). A memoryview of the same
+        # buffer reads and writes plain ints, so the per-cell accessors below go through it:
+        self._view = memoryview(self.cells)
+        # The number of words written through each cell (see write_word / erase_word) - 2 where words cross:
+        self._words = bytearray(len(self.cells))
+        # The same cells as packed lines (see LANE_BITS), border included: the rows, and the columns:
+        self._row_lines = [0] * (rows + 2)
+        self._col_lines = [0] * (cols + 2)
+        self._masks = _lane_masks(max(cols, rows) + 1)
+
+    def _pos(self, col, row):
+        return row * self.stride + col
+
+    def _in_grid(self, col, row):
+        return 1 <= col <= self.cols and 1 <= row <= self.rows
+
+    def _in_border(self, col, row):
+        return 0 <= col <= self.cols + 1 and 0 <= row <= self.rows + 1
+
+    def copy(self):
+        new_grid = LetterGrid(self.cols, self.rows, self.empty)
+        new_grid.cells = self.cells.copy()
+        new_grid._view = memoryview(new_grid.cells)
+        new_grid._words = self._words.copy()
+        new_grid._row_lines = self._row_lines.copy()
+        new_grid._col_lines = self._col_lines.copy()
+        return new_grid
+
+    def set_cell(self, col, row, value):
+        if not self._in_grid(col, row):
+            raise IndexError(f"Cell ({col}, {row}) is outside the grid")
+        code = EMPTY_CODE if value == self.empty else ord(value)
+        pos = self._pos(col, row)
+        self._view[pos] = code
+        if code == EMPTY_CODE:
+            self._words[pos] = 0
+        shift = col * LANE_BITS
+        self._row_lines[row] = self._row_lines[row] & ~(_LANE << shift) | code << shift
+        shift = row * LANE_BITS
+        self._col_lines[col] = self._col_lines[col] & ~(_LANE << shift) | code << shift
+
+    def write_word(self, col, row, vertical, word, codes):
+        """
+        Write a word on the grid. Every cell of it must be empty or hold the same letter already (see fit_score)
+        :param col: The column of the first letter
+        :param row: The row of the first letter
+        :param vertical: True if the word goes down, False if it goes across
+        :param word: The word
+        :param codes: The packed letter codes of the word (see letter_codes)
+        :return: A list with True for each letter that was written, and False for each letter that was on the grid
+        """
+        last_col, last_row = (col, row + len(word) - 1) if vertical else (col + len(word) - 1, row)
+        if not (self._in_grid(col, row) and self._in_grid(last_col, last_row)):
+            raise IndexError(f"Word {word} at ({col}, {row}) is outside the grid")
+        if vertical:
+            lines, cross_lines, line, first, step = self._col_lines, self._row_lines, col, row, self.stride
+        else:
+            lines, cross_lines, line, first, step = self._row_lines, self._col_lines, row, col, 1
+
+        # The cells that are set already hold the same letters, so the letters can be or'ed into the lines:
+        cells, words = self._view, self._words
+        pos = self._pos(col, row)
+        shift = line * LANE_BITS
+        written = []
+        for i, letter in enumerate(word, first):
+            new = cells[pos] == EMPTY_CODE
+            if new:
+                code = ord(letter)
+                cells[pos] = code
+                cross_lines[i] |= code << shift
+            words[pos] += 1
+            written.append(new)
+            pos += step
+        lines[line] |= codes << (first * LANE_BITS)
+        return written
+
+    def erase_word(self, col, row, vertical, word):
+        """
+        Remove a word written with write_word. A letter stays on the grid as long as another word written through its
+        cell is still there, so words can be removed in any order
+        :param col: The column of the first letter
+        :param row: The row of the first letter
+        :param vertical: True if the word goes down, False if it goes across
+        :param word: The word
+        :return: A list with True for each letter that was removed, and False for each letter that stays
+        """
+        last_col, last_row = (col, row + len(word) - 1) if vertical else (col + len(word) - 1, row)
+        if not (self._in_grid(col, row) and self._in_grid(last_col, last_row)):
+            raise IndexError(f"Word {word} at ({col}, {row}) is outside the grid")
+        if vertical:
+            lines, cross_lines, line, first, step = self._col_lines, self._row_lines, col, row, self.stride
+        else:
+            lines, cross_lines, line, first, step = self._row_lines, self._col_lines, row, col, 1
+
+        cells, words = self._view, self._words
+        pos = self._pos(col, row)
+        shift = line * LANE_BITS
+        line_cells = lines[line]
+        erased = []
+        for i in range(first, first + len(word)):
+            words[pos] -= 1
+            gone = words[pos] == 0
+            if gone:
+                cells[pos] = EMPTY_CODE
+                cross_lines[i] &= ~(_LANE << shift)
+                line_cells &= ~(_LANE << (i * LANE_BITS))
+            erased.append(gone)
+            pos += step
+        lines[line] = line_cells
+        return erased
+
+    def get_cell(self, col, row):
+        if not self._in_border(col, row):
+            raise IndexError(f"Cell ({col}, {row}) is outside the grid")
+        code = self._view[self._pos(col, row)]
+        return self.empty if code == EMPTY_CODE else chr(code)
+
+    def check_if_cell_clear(self, col, row):
+        """
+        Return True if the cell has no letter in it. Cells of the border are clear, cells beyond it are not
+        """
+        if not self._in_border(col, row):
+            return False
+        return self._view[self._pos(col, row)] == EMPTY_CODE
+
+    def fit_score(self, col, row, vertical, codes, length):
+        """
+        Score placing a word at (col, row). 0 signifies no fit, 1 means a fit, 2+ means a cross (1 + number of crosses).
+        A word fits if every cell is empty or already holds the same letter of a crossing word, the cells before and
+        after the word are empty, and the cells on both sides of every letter that is not a cross are empty.
+        :param col: The column of the first letter
+        :param row: The row of the first letter
+        :param vertical: True if the word goes down, False if it goes across
+        :param codes: The packed letter codes of the word (see letter_codes)
+        :param length: The number of letters of the word
+        :return: The score
+        """
+        if vertical:
+            if not (1 <= col <= self.cols and 1 <= row <= self.rows - length + 1):
+                return 0
+            lines, line, first = self._col_lines, col, row
+        else:
+            if not (1 <= row <= self.rows and 1 <= col <= self.cols - length + 1):
+                return 0
+            lines, line, first = self._row_lines, row, col
+
+        # The border guarantees that the cells before and after the word, and the lines on both of its sides, exist:
+        low, high, ends = self._masks[length]
+        shift = first * LANE_BITS
+        here = lines[line] >> (shift - LANE_BITS)  # The cell before the word is lane 0
+        if here & ends:
+            return 0
+        # The lanes after the word are left in - no carry crosses a lane, and & high keeps only the lanes of the word:
+        cells = here >> LANE_BITS
+        sides = (lines[line - 1] | lines[line + 1]) >> shift
+        # The high bit of a lane is set if the cell has a letter / a side cell has a letter / the cell's letter differs:
+        taken = (cells + low) & high
+        crossed = (sides + low) & high
+        differ = ((cells ^ codes) + low) & high
+        # An empty cell needs empty sides, and a letter must be the same letter of a word that crosses here (a letter
+        # with empty sides is part of a word going in the same direction):
+        if (taken ^ crossed) | (taken & differ):
+            return 0
+        return 1 + taken.bit_count()
+
+    def bounding_box_counts(self):
+        """
+        Count the cells in the bounding box of the letters on the grid, and the cells that hold letters
+        :return: (box_cells, letter_cells). Both are 0 if the grid is empty
+        """
+        occupied = self.cells.reshape(self.rows + 2, self.stride) != EMPTY_CODE
+        used_rows = np.flatnonzero(occupied.any(axis=1))
+        if used_rows.size == 0:
+            return 0, 0
+        used_cols = np.flatnonzero(occupied.any(axis=0))
+        box_cells = (used_rows[-1] - used_rows[0] + 1) * (used_cols[-1] - used_cols[0] + 1)
+        return int(box_cells), int(np.count_nonzero(self.cells))
+
+    def letter_cells(self):
+        """
+        Iterate over the cells that hold letters
+        :return: A generator of (letter, col, row) tuples
+        """
+        positions = np.flatnonzero(self.cells)
+        for pos, code in zip(positions.tolist(), self.cells[positions].tolist()):
+            row, col = divmod(pos, self.stride)
+            yield chr(code), col, row
+
+    def to_list(self):
+        """
+        Return the grid (without the border) as a list of rows, each a list of letters or the empty char
+        """
+        rows = self.cells.reshape(self.rows + 2, self.stride)[1:-1, 1:-1].tolist()
+        return [[self.empty if code == EMPTY_CODE else chr(code) for code in row] for row in rows]
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from crossword_gen.crossword_gen import _remove_hebrew_end_chars
+
+
+class LayoutCache(object):
+    """
+    An on-disk cache of crossword layouts, so the same words and grid don't need to be searched again.
+
+    The key is the normalized word list and extra word list, the grid size, the rtl flag, the seed, the search engine
+    and the search parameters that change the layout found (spins, time or iterations, ...). Every entry is a small JSON
+    file holding the word placements (without the clues, so editing a clue still hits the cache) and the score. The
+    least recently used entries are removed when there are more than max_entries.
+    """
+    def __init__(self, cache_dir, max_entries=1000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _normalize_words(words):
+        return sorted(_remove_hebrew_end_chars(w.word) for w in words)
+
+    def key(self, crossword, search=None):
+        """
+        The cache key of a crossword
+        :param crossword: The Crossword
+        :param search: A dict of the compute_crossword parameters the layout depends on (see Crossword.search_params)
+        :return: A hex string
+        """
+        key_data = {
+            "words": self._normalize_words(crossword.available_words),
+            "extra_words": self._normalize_words(crossword.extra_words),
+            "cols": crossword.cols,
+            "rows": crossword.rows,
+            "rtl": bool(crossword.rtl),
+            "seed": crossword.seed,
+            "engine": crossword.engine,
+            "maxloops": crossword.maxloops,
+            "search": search or {},
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, crossword, search=None):
+        """
+        Look up the layout of a crossword
+        :param crossword: The Crossword
+        :param search: The search parameters (see key)
+        :return: (placements, score) with placements as returned by Crossword.get_placements (with the crossword's own
+            clues), or None if the layout is not in the cache
+        """
+        path = self._path(self.key(crossword, search))
+        try:
+            with open(path, 'r') as fp:
+                entry = json.load(fp)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+
+        # Put the clues back - the same word may appear more than once with different clues:
+        clues = {}
+        for word in crossword.available_words + crossword.extra_words:
+            clues.setdefault(word.word, []).append(word.clue)
+        placements = []
+        for word, col, row, vertical in entry["placements"]:
+            if not clues.get(word):
+                return None  # Doesn't match the crossword's words
+            placements.append((word, clues[word].pop(0), col, row, vertical))
+        return placements, entry["score"]
+
+    def put(self, crossword, search=None):
+        """
+        Store the layout of a crossword (after compute_crossword), unless a better one is already stored
+        :param crossword: The Crossword
+        :param search: The search parameters (see key)
+        :return:
+        """
+        cached = self.get(crossword, search)
+        if cached is not None and (len(cached[0]), cached[1]) >= (len(crossword.current_word_list), crossword.score):
+            return
+
+        entry = {
+            "placements": [(word, col, row, int(vertical))
+                           for word, _, col, row, vertical in crossword.get_placements()],
+            "score": crossword.score,
+        }
+        # Write to a temp file and rename, so a concurrent reader never sees half a file:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(entry, fp, ensure_ascii=False)
+        os.replace(tmp_path, self._path(self.key(crossword, search)))
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries above max_entries
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass  # Removed by someone else
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, name))
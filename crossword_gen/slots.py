@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+
+class SlotIndex(object):
+    """
+    The open slots of a crossword grid: every letter on the grid that a new word can still cross, together with the
+    direction the new word must go in to cross it. A letter of an across word can only be crossed by a down word and
+    the other way around, and a letter that is already crossed is not open any more.
+
+    The index is kept up to date by Crossword.set_word / unset_word, so the candidate placements of a word are only
+    the ones that cross an open slot with the same letter, in the right direction and inside the grid.
+    """
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.slots = defaultdict(set)  # letter -> {(col, row, vertical)} - a word going in 'vertical' may cross here
+
+    def open(self, letter, col, row, vertical):
+        self.slots[letter].add((col, row, vertical))
+
+    def close(self, letter, col, row, vertical):
+        self.slots[letter].discard((col, row, vertical))
+
+    def placements(self, word):
+        """
+        The distinct placements of a word that cross an open slot and fit inside the grid. They still need a fit check
+        against the letters around them
+        :param word: The Word to place
+        :return: A set of (col, row, vertical) start positions
+        """
+        res = set()
+        for i, letter in enumerate(word.word):
+            for col, row, vertical in self.slots.get(letter, ()):
+                if vertical:
+                    start = row - i
+                    if start >= 1 and start + word.length - 1 <= self.rows:
+                        res.add((col, start, 1))
+                else:
+                    start = col - i
+                    if start >= 1 and start + word.length - 1 <= self.cols:
+                        res.add((start, row, 0))
+        return res
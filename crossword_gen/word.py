@@ -1,42 +1,64 @@
 import re
 import random
+from collections import namedtuple
+
+from crossword_gen.grid import letter_codes
 
 class Word(object):
-    def __init__(self, word=None, clue=None, random_factor=3):
-        self.word = re.sub(r'\s', '', word.lower())
-        self.clue = clue
-        self.length = len(self.word)
-        # the below are set when placed on board
-        self.row = None
-        self.col = None
-        self.vertical = None
-        self.number = None
-        self.rank = len(self.word) + random_factor * random.random()
+    """
+    A word of the word list and its clue. Words are immutable - where a word is placed on the grid is kept in a
+    separate Placement, so a layout can be saved by copying its list of placements, without copying the words.
+    """
+    __slots__ = ('word', 'clue', 'length', 'codes', 'rank')
 
-    def down_across(self):  # return down or across
-        if self.vertical:
-            return 'down'
-        else:
-            return 'across'
+    def __init__(self, word=None, clue=None, random_factor=3, rng=None):
+        """
+        :param word: The word
+        :param clue: The clue (definition) of the word
+        :param random_factor: The weight of the random part of the rank, which sets the order words are placed in
+        :param rng: The random.Random to draw the rank from. If None, the global random module is used
+        """
+        word = re.sub(r'\s', '', word.lower())
+        rng = random if rng is None else rng
+        _set = object.__setattr__
+        _set(self, 'word', word)
+        _set(self, 'clue', clue)
+        _set(self, 'length', len(word))
+        _set(self, 'codes', letter_codes(word))  # The letters packed as in the grid lines (see LetterGrid.fit_score)
+        _set(self, 'rank', len(word) + random_factor * rng.random())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Word is immutable, can't set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Word is immutable, can't delete {name}")
 
-    def reset(self):
-        # Forget the row, col, vertical, number:
-        self.row = None
-        self.col = None
-        self.vertical = None
-        self.number = None
-
-    def copy(self):
-        # Returns a new copy of self:
-        copy = Word(self.word, self.clue)
-        copy.row = self.row
-        copy.col = self.col
-        copy.vertical = self.vertical
-        copy.number = self.number
-        return copy
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
 
     def __repr__(self):
         return self.word
 
     def __len__(self):
         return len(self.word)
+
+
+class Placement(namedtuple('Placement', ['word', 'col', 'row', 'vertical', 'number'])):
+    """
+    A Word placed on the grid: the cell of its first letter (1 based), its direction and its definition number (None
+    until the words are numbered)
+    """
+    __slots__ = ()
+
+    def down_across(self):  # return down or across
+        if self.vertical:
+            return 'down'
+        else:
+            return 'across'
+
+    def __repr__(self):
+        return f"{self.word.word}@({self.col}, {self.row}, {self.down_across()})"
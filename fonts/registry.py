@@ -0,0 +1,45 @@
+"""
+The TTF fonts of the PDF generators. A font is registered with reportlab the first time a document that uses it is
+built, and only once per process, so importing a generator module doesn't parse any font files.
+"""
+import os
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+
+HEBREW_FONT = 'Hebrew'
+
+# Font name -> its TTF file in this directory:
+FONT_FILES = {
+    HEBREW_FONT: 'arial-hebrew.ttf',
+}
+
+_registered = set()
+_lock = threading.Lock()  # Streamlit runs the sessions in threads
+
+
+def font_path(name):
+    """
+    The path of the TTF file of a font
+    :param name: The font name (a key of FONT_FILES)
+    :return: The absolute path
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FONT_FILES[name])
+
+
+def register_font(name=HEBREW_FONT):
+    """
+    Register a font with reportlab, unless it is registered already. Call before creating the paragraphs that use it
+    :param name: The font name (a key of FONT_FILES)
+    :return: The font name, to use in styles
+    """
+    if name in _registered:
+        return name
+    with _lock:
+        if name not in _registered:
+            from reportlab.pdfbase.ttfonts import TTFont
+            pdfmetrics.registerFont(TTFont(name, font_path(name)))
+            # A single face - lets paragraphs in this font hold <font>, <b> and <i> tags:
+            pdfmetrics.registerFontFamily(name, normal=name, bold=name, italic=name, boldItalic=name)
+            _registered.add(name)
+    return name
@@ -0,0 +1,120 @@
+"""
+Measure how long the Streamlit pages take to import the modules they use, each time in a fresh interpreter (a cold
+start, like a new server process or a worker process).
+
+Only the import statements of each page are run, not the page itself. Streamlit is imported before the clock starts,
+since all the pages share it, unless --with_streamlit is given. Other modules (e.g. the generators used in worker
+processes) can be timed with --modules.
+
+Run from the repository root:
+    python import_benchmark.py --repeat 5
+    python import_benchmark.py --modules crossword_gen.cw_to_pdf Math.math_worksheet
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(ROOT_DIR, 'pages')
+
+# Runs in the fresh interpreter - import the shared modules first, then time the imports:
+_TIMER_CODE = """
+import time
+{preload}
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+def page_imports(path):
+    """
+    The top level import statements of a page
+    :param path: The page file
+    :return: A list of import statements (source code)
+    """
+    with open(path, 'r', encoding='utf-8') as fp:
+        tree = ast.parse(fp.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def _is_streamlit_import(statement):
+    return statement.startswith('import streamlit') or statement.startswith('from streamlit')
+
+
+def time_imports(imports, preload=(), repeat=3):
+    """
+    Time import statements in fresh interpreters
+    :param imports: A list of import statements to time
+    :param preload: A list of import statements to run before the clock starts
+    :param repeat: The number of interpreters to run
+    :return: A list of the times in seconds, one for each run
+    """
+    code = _TIMER_CODE.format(preload='\n'.join(preload), imports='\n'.join(imports))
+    times = []
+    for _ in range(repeat):
+        res = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True)
+        if res.returncode != 0:
+            lines = res.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"Exit code {res.returncode}")
+        times.append(float(res.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def _result(name, imports, preload, repeat):
+    res = {'name': name}
+    try:
+        times = time_imports(imports, preload, repeat)
+        res['min_ms'] = round(1000 * min(times), 1)
+        res['median_ms'] = round(1000 * statistics.median(times), 1)
+    except RuntimeError as e:
+        res['error'] = str(e)
+    return res
+
+
+def run_benchmark(repeat=3, with_streamlit=False, modules=None):
+    """
+    Time the imports of every page (or of the given modules)
+    :param repeat: The number of fresh interpreters to time each one in
+    :param with_streamlit: If True, the time of importing streamlit is counted for every page
+    :param modules: If not None, a list of module names to time instead of the pages
+    :return: A list of dicts with the name, and the min and median times in ms (or the error if the import failed)
+    """
+    results = []
+    if modules is not None:
+        for module in modules:
+            results.append(_result(module, [f'import {module}'], [], repeat))
+        return results
+
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.py'))):
+        if os.path.basename(path) == '__init__.py':
+            continue
+        imports = page_imports(path)
+        preload = [] if with_streamlit else [i for i in imports if _is_streamlit_import(i)]
+        imports = [i for i in imports if i not in preload]
+        results.append(_result(os.path.relpath(path, ROOT_DIR), imports, preload, repeat))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Number of fresh interpreters for each page")
+    parser.add_argument("--with_streamlit", action="store_true", help="Count the import of streamlit too")
+    parser.add_argument("-m", "--modules", nargs='+', default=None, help="Time these modules instead of the pages")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="Save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeat, args.with_streamlit, args.modules)
+    for res in results:
+        if 'error' in res:
+            print(f"{res['name']:<32} failed - {res['error']}")
+        else:
+            print(f"{res['name']:<32} {res['min_ms']:>8.1f} ms min {res['median_ms']:>8.1f} ms median")
+    if args.output_file:
+        with open(args.output_file, 'w') as fp:
+            json.dump(results, fp, indent=2)
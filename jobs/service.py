@@ -0,0 +1,420 @@
+"""
+A local service that runs the slow generators (crosswords, bingo cards, worksheets) in a bounded set of worker
+processes, so they don't run in the Streamlit script thread and can't take all the server's CPU.
+
+Jobs wait in a queue and are started by priority, then in the order they were submitted. Every job has a kind, and a
+kind can limit how many of its jobs run at once and how long each may take - so a few heavy crosswords can't keep the
+quick worksheets waiting. A job that runs out of time has its worker process killed (and replaced).
+
+    service = get_job_service()
+    job = service.submit(KIND_CROSSWORD, crossword_pdf, ...)
+    deadline = time.time() + 120  # Don't wait forever, e.g. when the queue is long
+    while not job.done() and time.time() < deadline:
+        show(job.progress)  # The latest value the job sent with report_progress
+        time.sleep(0.2)
+    pdf = job.result(timeout=0)  # Raises JobError if the job failed, timed out or was cancelled, TimeoutError if not done
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait
+
+# Job kinds:
+KIND_INTERACTIVE = 'interactive'  # Quick jobs a user is waiting for (worksheets, word ciphers)
+KIND_CROSSWORD = 'crossword'
+KIND_BINGO = 'bingo'
+
+# Job statuses:
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_TIMEOUT = 'timeout'
+JOB_CANCELLED = 'cancelled'
+
+
+def default_kinds(max_workers):
+    """
+    The default settings of the job kinds: the heavy kinds may use at most half of the workers each, so there are
+    always workers left for interactive jobs, which also go first in the queue
+    :param max_workers: The number of worker processes
+    :return: A dict of kind -> dict(max_concurrent, timeout, priority). Lower priority values start first
+    """
+    heavy = max(1, max_workers // 2)
+    return {
+        KIND_INTERACTIVE: dict(max_concurrent=None, timeout=30.0, priority=0),
+        KIND_CROSSWORD: dict(max_concurrent=heavy, timeout=60.0, priority=1),
+        KIND_BINGO: dict(max_concurrent=heavy, timeout=300.0, priority=1),
+    }
+
+
+class JobError(Exception):
+    """
+    A job failed, timed out or was cancelled
+    """
+
+
+class Job(object):
+    """
+    A job submitted to the JobService. Read its status and progress, and get its result with result()
+    """
+    def __init__(self, job_id, kind, func, args, kwargs, timeout, priority):
+        self.job_id = job_id
+        self.kind = kind
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.priority = priority
+        self.status = JOB_PENDING
+        self.progress = None  # The latest value sent by the job with report_progress
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._result = None
+        self._done_event = threading.Event()
+
+    def done(self):
+        return self._done_event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the job to finish and return its result
+        :param timeout: The time in seconds to wait, or None to wait as long as it takes
+        :return: The value returned by the job function
+        """
+        if not self._done_event.wait(timeout):
+            raise TimeoutError(f"Job {self.job_id} is still {self.status}")
+        if self.status != JOB_DONE:
+            raise JobError(f"Job {self.job_id} ({self.kind}) {self.status}: {self.error}")
+        return self._result
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self._result = result
+        self.error = error
+        self.finished = time.time()
+        self.func = self.args = self.kwargs = None  # Don't keep the inputs around
+        self._done_event.set()
+
+    def __repr__(self):
+        return f"Job({self.job_id}, {self.kind}, {self.status})"
+
+
+# The connection of a worker process to the service, while it runs a job (used by report_progress):
+_worker_conn = None
+
+
+def report_progress(value):
+    """
+    Send the progress of the job running in this process to the service, where it is kept in Job.progress. Does
+    nothing outside of a worker process, so job functions can be called directly too
+    :param value: Any picklable value
+    """
+    if _worker_conn is not None:
+        _worker_conn.send(('progress', value))
+
+
+def _worker_main(conn):
+    # The loop of a worker process: run jobs until told to stop
+    global _worker_conn
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args, kwargs = task
+        _worker_conn = conn
+        try:
+            message = ('done', func(*args, **kwargs))
+        except Exception:
+            message = ('failed', traceback.format_exc(limit=5))
+        _worker_conn = None
+        try:
+            conn.send(message)
+        except Exception as e:  # e.g. a result that can't be pickled
+            conn.send(('failed', f"Can't send the result: {e}"))
+
+
+class _Worker(object):
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+        self.deadline = None
+
+    def start(self, job):
+        self.job = job
+        self.deadline = None if job.timeout is None else time.time() + job.timeout
+        self.conn.send((job.func, job.args, job.kwargs))
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class JobService(object):
+    """
+    Runs jobs in at most max_workers worker processes (see the module doc). The worker processes are started when
+    needed and reused, so the generator modules are imported once per worker, not once per job
+    """
+    def __init__(self, max_workers=None, kinds=None, max_queued=100, mp_context='spawn'):
+        """
+        :param max_workers: The number of worker processes (None for one per CPU)
+        :param kinds: A dict of kind -> dict(max_concurrent, timeout, priority), see default_kinds. Jobs of other
+            kinds have no concurrency limit, no timeout and priority 0
+        :param max_queued: The maximal number of jobs waiting in the queue. submit raises JobError when it is full
+        :param mp_context: The multiprocessing start method. 'spawn' is safe to use from a threaded server
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.kinds = default_kinds(self.max_workers) if kinds is None else kinds
+        self.max_queued = max_queued
+        self._mp_context = multiprocessing.get_context(mp_context)
+        self._lock = threading.Lock()
+        self._queue = []  # A heap of (priority, sequence, job)
+        self._sequence = itertools.count()
+        self._idle_workers = []
+        self._busy_workers = []
+        self._running = {}  # kind -> the number of its jobs running
+        self._wakeup_recv, self._wakeup_send = self._mp_context.Pipe(duplex=False)
+        self._shutdown = False
+        self._error = None  # Why the service thread stopped, if it failed
+        self._thread = threading.Thread(target=self._run, name="JobService", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queue a job
+        :param kind: The kind of the job, which sets its concurrency limit, timeout and priority
+        :param func: The function to run. It must be importable by the worker processes (a module level function)
+        :param args: The arguments of func. They and its result must be picklable
+        :param kwargs: The keyword arguments of func
+        :return: A Job
+        """
+        settings = self.kinds.get(kind, {})
+        with self._lock:
+            if self._error is not None:
+                raise JobError(f"The job service failed: {self._error}")
+            if self._shutdown:
+                raise JobError("The job service is shut down")
+            if len(self._queue) >= self.max_queued:
+                raise JobError(f"Too many jobs are waiting ({len(self._queue)}), try again later")
+            job = Job(next(self._sequence), kind, func, args, kwargs, settings.get('timeout'),
+                      settings.get('priority', 0))
+            heapq.heappush(self._queue, (job.priority, job.job_id, job))
+        self._wakeup()
+        return job
+
+    def cancel(self, job):
+        """
+        Cancel a job. A running job has its worker process killed
+        :param job: The Job
+        :return: True if the job was cancelled, False if it was finished already
+        """
+        with self._lock:
+            if job.done():
+                return False
+            if job.status == JOB_PENDING:
+                self._queue.remove((job.priority, job.job_id, job))
+                heapq.heapify(self._queue)
+                self._finish(job, JOB_CANCELLED, error="Cancelled")
+                return True
+            job.status = JOB_CANCELLED  # The service thread kills its worker
+        self._wakeup()
+        return True
+
+    def queue_length(self):
+        with self._lock:
+            return len(self._queue)
+
+    @property
+    def failed(self):
+        """
+        True if the service thread stopped on an unexpected error. Its jobs have failed, and submit raises JobError
+        """
+        return self._error is not None
+
+    def shutdown(self, cancel_pending=True):
+        """
+        Stop the service and its worker processes. Running jobs are killed
+        :param cancel_pending: If True, the queued jobs are cancelled. Else they are left pending
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_pending:
+                for _, _, job in self._queue:
+                    self._finish(job, JOB_CANCELLED, error="The job service is shut down")
+                self._queue = []
+        self._wakeup()
+        self._thread.join()
+
+    def _wakeup(self):
+        self._wakeup_send.send(None)
+
+    @staticmethod
+    def _finish(job, status, result=None, error=None):
+        job._finish(status, result, error)
+
+    def _start_jobs(self):
+        """
+        Start the queued jobs that have a free worker and are within the limit of their kind
+        """
+        with self._lock:
+            skipped = []
+            while self._queue and len(self._busy_workers) < self.max_workers:
+                entry = heapq.heappop(self._queue)
+                job = entry[2]
+                limit = self.kinds.get(job.kind, {}).get('max_concurrent')
+                if limit is not None and self._running.get(job.kind, 0) >= limit:
+                    skipped.append(entry)  # Waits for a job of its kind to finish
+                    continue
+                worker = None
+                try:
+                    worker = self._idle_workers.pop() if self._idle_workers else _Worker(self._mp_context)
+                    worker.start(job)
+                except Exception as e:  # The worker process can't start, or the job can't be pickled
+                    if worker is not None:
+                        worker.kill()
+                    self._finish(job, JOB_FAILED, error=f"Can't start the job: {e}")
+                    continue
+                job.status = JOB_RUNNING
+                job.started = time.time()
+                self._busy_workers.append(worker)
+                self._running[job.kind] = self._running.get(job.kind, 0) + 1
+            for entry in skipped:
+                heapq.heappush(self._queue, entry)
+
+    def _release(self, worker, status, result=None, error=None, kill=False):
+        job = worker.job
+        self._busy_workers.remove(worker)
+        self._running[job.kind] -= 1
+        worker.job = None
+        if kill:
+            worker.kill()
+        else:
+            self._idle_workers.append(worker)
+        self._finish(job, status, result, error)
+
+    def _run(self):
+        # The service thread: start jobs, collect their progress and results, and enforce the timeouts
+        while True:
+            with self._lock:
+                if self._shutdown:
+                    break
+            try:
+                self._run_once()
+            except Exception:
+                # A bug in the service - fail all the jobs rather than leave them (and the pages waiting for them)
+                # pending forever:
+                self._fail(traceback.format_exc(limit=5))
+                return
+
+        for worker in self._busy_workers:
+            self._finish(worker.job, JOB_CANCELLED, error="The job service is shut down")
+            worker.kill()
+        for worker in self._idle_workers:
+            worker.stop()
+        self._busy_workers = []
+        self._idle_workers = []
+
+    def _run_once(self):
+        self._start_jobs()
+
+        deadlines = [w.deadline for w in self._busy_workers if w.deadline is not None]
+        timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+        ready = wait([self._wakeup_recv] + [w.conn for w in self._busy_workers], timeout)
+
+        if self._wakeup_recv in ready:
+            while self._wakeup_recv.poll():
+                self._wakeup_recv.recv()
+        for worker in list(self._busy_workers):
+            if worker.conn in ready:
+                self._receive(worker)
+        now = time.time()
+        for worker in list(self._busy_workers):
+            if worker.job.status == JOB_CANCELLED:
+                self._release(worker, JOB_CANCELLED, error="Cancelled", kill=True)
+            elif worker.deadline is not None and now > worker.deadline:
+                self._release(worker, JOB_TIMEOUT, error=f"Took more than {worker.job.timeout}s", kill=True)
+
+    def _fail(self, error):
+        # Stop the service after an unexpected error: fail the running and the queued jobs, and refuse new ones
+        with self._lock:
+            self._error = error
+            self._shutdown = True
+            jobs = [job for _, _, job in self._queue] + [worker.job for worker in self._busy_workers]
+            self._queue = []
+            workers = self._busy_workers + self._idle_workers
+            self._busy_workers = []
+            self._idle_workers = []
+        for job in jobs:
+            if job is not None and not job.done():
+                self._finish(job, JOB_FAILED, error=f"The job service failed: {error}")
+        for worker in workers:
+            try:
+                worker.kill()
+            except Exception:
+                pass  # Already gone
+
+    def _receive(self, worker):
+        # Read the messages a worker sent: progress updates, and the result when the job is done
+        while True:
+            try:
+                if not worker.conn.poll():
+                    return
+                message, value = worker.conn.recv()
+            except (EOFError, OSError):
+                self._release(worker, JOB_FAILED, error="The worker process died", kill=True)
+                return
+            except Exception as e:  # e.g. a result that can't be unpickled here
+                self._release(worker, JOB_FAILED, error=f"Can't read the job's result: {e}", kill=True)
+                return
+            if message == 'progress':
+                worker.job.progress = value
+            elif worker.job.status == JOB_CANCELLED:
+                self._release(worker, JOB_CANCELLED, error="Cancelled")
+                return
+            elif message == 'done':
+                self._release(worker, JOB_DONE, result=value)
+                return
+            else:
+                self._release(worker, JOB_FAILED, error=value)
+                return
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_job_service(max_workers=None):
+    """
+    The job service of this process, started on the first call (and again if it failed). All the Streamlit sessions
+    share it
+    :param max_workers: The number of worker processes, used only when the service is started
+    :return: A JobService
+    """
+    global _service
+    with _service_lock:
+        if _service is None or _service.failed:
+            _service = JobService(max_workers)
+        return _service
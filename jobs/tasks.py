@@ -0,0 +1,104 @@
+"""
+The generators as job functions for the JobService: each one takes picklable arguments and returns the document bytes,
+so the pages can download the result without writing files. The generator modules are imported inside the functions,
+so a worker process only imports what its jobs use.
+"""
+import io
+
+from jobs.service import report_progress
+
+HEB_LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+
+
+def math_worksheets_pdf(worksheets):
+    """
+    :param worksheets: A list of dicts with the arguments of each worksheet (see generate_math_worksheets)
+    :return: The PDF bytes
+    """
+    from Math.math_worksheet import generate_math_worksheets
+
+    output = io.BytesIO()
+    generate_math_worksheets(worksheets, output)
+    return output.getvalue()
+
+
+def math_packet_pdf(worksheet, n_versions, seed=None, answer_keys=True):
+    """
+    :param worksheet: A dict with the arguments of the worksheet (see generate_math_packet)
+    :param n_versions: The number of versions of the worksheet, each with its own questions
+    :param seed: The random seed of the packet
+    :param answer_keys: If True, the answer keys are added at the end
+    :return: The PDF bytes
+    """
+    from Math.math_worksheet import generate_math_packet
+
+    output = io.BytesIO()
+    generate_math_packet(output_pdf=output, n_versions=n_versions, seed=seed, answer_keys=answer_keys, **worksheet)
+    return output.getvalue()
+
+
+def word_cipher_docx(sentences, secret):
+    """
+    :param sentences: A list of (question, answer) tuples (see WordCipherGen.create_doc)
+    :param secret: The (question, answer) of the secret
+    :return: The DOCX bytes
+    """
+    from WordCipher.word_cipher_gen import WordCipherGen
+
+    word_cipher = WordCipherGen()
+    word_cipher.create_doc(sentences, secret)
+    output = io.BytesIO()
+    word_cipher.save_doc(output)
+    return output.getvalue()
+
+
+def bingo_pdf(image_files, card_size, n_pages=30, seed=None):
+    """
+    :param image_files: The image files to put on the cards
+    :param card_size: The number of rows (and columns) of each card
+    :param n_pages: The number of pages
+    :param seed: The random seed of the cards
+    :return: The PDF bytes
+    """
+    from BingoGen.bingo_gen import generate_bingo_card
+
+    output = io.BytesIO()
+    generate_bingo_card(list(image_files), output, card_size, n_pages, seed=seed)
+    return output.getvalue()
+
+
+def crossword_pdf(size, word_list, extra_word_list=(), hebrew=True, engine=None, time_permitted=5.0, patience=None,
+                  cache_dir=None, seed=None):
+    """
+    Generate a crossword and its PDF (with the solution page). Every better layout found is sent as progress: the
+    solved grid DataFrame, for a preview
+    :param size: The grid size (size x size)
+    :param word_list: A list of (word, clue) tuples
+    :param extra_word_list: A list of (word, clue) tuples of extra words
+    :param hebrew: Are the words hebrew
+    :param engine: The search engine (see Crossword), None for the default
+    :param time_permitted: The time in seconds to search
+    :param patience: See Crossword.compute_crossword
+    :param cache_dir: The directory of a LayoutCache, or None to not use one
+    :param seed: The random seed
+    :return: A dict with the "pdf" bytes and the number of "words_placed"
+    """
+    import string
+    from crossword_gen.crossword_gen import Crossword, ENGINE_GREEDY
+    from crossword_gen.cw_to_pdf import create_crossword_pdf, RENDER_CANVAS
+    from crossword_gen.layout_cache import LayoutCache
+
+    crossword = Crossword(size, size, '*', 5000, word_list, extra_words=list(extra_word_list),
+                          letters=HEB_LETTERS if hebrew else string.ascii_lowercase, rtl=True,
+                          engine=engine or ENGINE_GREEDY, seed=seed)
+    # The search runs in this worker only - the service limits how many run at once:
+    crossword.compute_crossword(time_permitted=time_permitted, spins=2, workers=1,
+                                cache=LayoutCache(cache_dir) if cache_dir else None,
+                                on_improve=lambda cw: report_progress(cw.display()[1]), patience=patience)
+
+    empty_df, solved_df = crossword.display()
+    across_defs, down_defs = crossword.legend()
+    output = io.BytesIO()
+    create_crossword_pdf(empty_df, ["אופקי"] + across_defs, ["מאונך"] + down_defs, output, solved_df=solved_df,
+                         renderer=RENDER_CANVAS)
+    return {"pdf": output.getvalue(), "words_placed": len(crossword.current_word_list)}
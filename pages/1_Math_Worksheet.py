@@ -1,5 +1,7 @@
 import streamlit as st
-from Math.math_worksheet import generate_math_worksheet, DIR_HORIZONTAL, DIR_VERTICAL
+from Math.math_worksheet import DIR_HORIZONTAL, DIR_VERTICAL
+from jobs.service import get_job_service, JobError, KIND_INTERACTIVE
+from jobs.tasks import math_packet_pdf
 
 st.title("Math Worksheets")
 worksheet_title = st.text_input("Worksheet name:", "משימה בחשבון", key="sheet_title")
@@ -10,14 +12,25 @@ operation_type = st.radio(
 max_number_range = st.number_input("Max number", min_value=5, max_value=1000, step=5, value=100)  # Choose from '10', '100', '1000'
 horizontal_or_vertical = st.radio("Horizontal or Vertical?", key="horiz_vert", options=["Horizontal", "Vertical"])
 num_questions = st.number_input("Number of questions", min_value=30, max_value=100, step=10)  # Number of questions per page
-output_pdf = '/tmp/math_worksheet.pdf'
+num_pages = st.number_input("Number of worksheets", min_value=1, max_value=50, value=1)  # Each with its own questions
+answer_keys = st.checkbox("Add answer keys", value=False)
+
+RESULT_TIMEOUT = 60  # Seconds to wait for the worksheet, including the time in the job queue
 
 def _create_worksheet():
     direction = DIR_HORIZONTAL if horizontal_or_vertical=="Horizontal" else DIR_VERTICAL
-    generate_math_worksheet(worksheet_title, operation_type, max_number_range, num_questions, output_pdf, direction)
-    print(f'PDF created: {output_pdf}')
-
-_create_worksheet()
+    worksheet = dict(title=worksheet_title, operation=operation_type, number_range=max_number_range,
+                     num_questions=num_questions, direction=direction)
+    # Build all the versions in one PDF in memory, in the job service:
+    service = get_job_service()
+    job = service.submit(KIND_INTERACTIVE, math_packet_pdf, worksheet, num_pages, answer_keys=answer_keys)
+    try:
+        return job.result(timeout=RESULT_TIMEOUT)
+    except TimeoutError:
+        service.cancel(job)
+        raise JobError("It took too long, try again later")
 
-with open(output_pdf, "rb") as fp:
-    st.download_button("Download", data=fp, file_name="math_worksheet.pdf", on_click=_create_worksheet)
\ No newline at end of file
+try:
+    st.download_button("Download", data=_create_worksheet(), file_name="math_worksheet.pdf")
+except JobError as e:
+    st.error(f"Failed to create the worksheet: {e}")
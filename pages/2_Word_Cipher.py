@@ -1,5 +1,6 @@
 import streamlit as st
-from WordCipher.word_cipher_gen import WordCipherGen
+from jobs.service import get_job_service, JobError, KIND_INTERACTIVE
+from jobs.tasks import word_cipher_docx
 
 st.title("שאלות")
 q_cols = st.columns([0.3, 0.7])
@@ -28,13 +29,21 @@ def _remove_hebrew_end_chars(s):
     trantab = str.maketrans(ends, regs)
     return s.translate(trantab)
 
+RESULT_TIMEOUT = 60  # Seconds to wait for the worksheet, including the time in the job queue
+
 if st.button("Go!"):
     sentences = [(questions[i],_remove_hebrew_end_chars(answers[i])) for i in range(len(questions)) if (questions[i] is not None) and (len(questions[i]) > 0)]
     secret = (secret_q, _remove_hebrew_end_chars(secret_ans))
 
-    word_cipher = WordCipherGen()
-    word_cipher.create_doc(sentences, secret)
-    word_cipher.save_doc("/tmp/worksheet.docx")
+    service = get_job_service()
+    try:
+        job = service.submit(KIND_INTERACTIVE, word_cipher_docx, sentences, secret)
+        docx_data = job.result(timeout=RESULT_TIMEOUT)
+    except JobError as e:
+        st.error(f"Failed to create the worksheet: {e}")
+    except TimeoutError:
+        service.cancel(job)
+        st.error("Creating the worksheet took too long, try again later")
+    else:
+        st.download_button("Download", data=docx_data, file_name="worksheet.docx")
 
-    with open("/tmp/worksheet.docx", "rb") as fp:
-        st.download_button("Download", data=fp, file_name="worksheet.docx")
@@ -1,9 +1,11 @@
 import os
-import string
+import tempfile
+import time
 
 import streamlit as st
-from crossword_gen.crossword_gen import Crossword, read_word_and_defs
-from crossword_gen.cw_to_pdf import create_crossword_pdf
+from crossword_gen.crossword_gen import read_word_and_defs, ENGINE_GREEDY, ENGINE_BACKTRACK
+from jobs.service import get_job_service, JobError, KIND_CROSSWORD
+from jobs.tasks import crossword_pdf
 
 st.title("Crossword Puzzle Generator")
 """
@@ -31,6 +33,7 @@ cw_words_data = cols[0].file_uploader("Word definitions")
 cols[0].download_button("Download sample word definitions", file_name="sample_defs.txt", data=heb_defs_data)
 cw_extra_words_data = cols[1].file_uploader("Extra word definitions")
 is_hebrew = st.toggle("Is Hebrew?", value=True)
+engine = st.radio("Search method", options=[ENGINE_GREEDY, ENGINE_BACKTRACK], horizontal=True)
 
 word_list = None
 if cw_words_data is not None:
@@ -43,32 +46,37 @@ if cw_extra_words_data is not None:
 else:
     extra_word_list = []
 
-if is_hebrew:
-    letters = 'אבגדהוזחטיכלמנסעפצקרשת'
-else:
-    letters = string.ascii_lowercase
-
-if (word_list is not None) and st.button("Go!"):
-    crossword = Crossword(cw_size, cw_size, '*', 5000, word_list, extra_words=extra_word_list, letters=letters, rtl=True)
-    crossword.compute_crossword(time_permitted=5.00, spins=2)
-    st.write(f"Used {len(crossword.current_word_list)} words. Word list had {len(word_list)}")
+RESULT_TIMEOUT = 120  # Seconds to wait for the crossword, including the time in the job queue
 
-    # Create the PDF:
-    # Create a DataFrame from the crossword data
-    empty_df, solved_df = crossword.display()
+def _create_crossword():
+    # The search runs in the job service, so it doesn't block this session or take all the CPUs:
+    service = get_job_service()
+    job = service.submit(KIND_CROSSWORD, crossword_pdf, cw_size, word_list, extra_word_list,
+                         hebrew=is_hebrew, engine=engine, time_permitted=5.00, patience=300,
+                         cache_dir=os.path.join(tempfile.gettempdir(), "crossword_layouts"))
+    preview = st.empty()
+    with st.spinner("Creating the crossword..."):
+        # Show the best layout found so far while the search runs:
+        shown = None
+        deadline = time.time() + RESULT_TIMEOUT
+        while not job.done() and time.time() < deadline:
+            if job.progress is not shown:
+                shown = job.progress
+                preview.dataframe(shown)
+            time.sleep(0.2)
+    preview.empty()
 
-    # Sample definitions
-    across_defs, down_defs = crossword.legend()
-    across_definitions = ["אופקי"] + across_defs
-    down_definitions = ["מאונך"] + down_defs
+    try:
+        return job.result(timeout=0)
+    except TimeoutError:
+        service.cancel(job)
+        raise JobError("It took too long, try again later")
 
-    # Output PDF file name
-    output_filename = "/tmp/crossword.pdf"
-
-    # Call the function to generate the crossword PDF
-    if os.path.isfile(output_filename):
-        os.remove(output_filename)
-    create_crossword_pdf(empty_df, across_definitions, down_definitions, output_filename, solved_df=solved_df)
-
-    with open(output_filename, "rb") as fp:
-        st.download_button("Download result", data=fp, file_name="crossword.pdf")
\ No newline at end of file
+if (word_list is not None) and st.button("Go!"):
+    try:
+        res = _create_crossword()
+    except JobError as e:
+        st.error(f"Failed to create the crossword: {e}")
+    else:
+        st.write(f"Used {res['words_placed']} words. Word list had {len(word_list)}")
+        st.download_button("Download result", data=res["pdf"], file_name="crossword.pdf")